@@ -0,0 +1,322 @@
+"""Offline benchmark replaying recorded video through the detection backend.
+
+    python benchmark.py --source clip.mp4 --source ../modelRuns/val_batch --cameras 1 2 4 --batch-sizes 1 4 8
+    python benchmark.py --source clip.mp4 --baseline bench.json --max-regression 0.1
+
+Every camera count / batch size combination runs in a fresh process with the
+full app (lifespan, capture threads, scheduler, pipeline, outbox) against local
+stub endpoints for Convex, Telegram, push notifications and imgbb. Sources are
+video files or image directories, looped and paced at --replay-fps. The report
+covers inference fps, inference and detection latency percentiles, CPU and
+memory use and event counts; the run exits non-zero when a gate fails.
+"""
+import argparse
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every backend call the way the real services do on success"""
+
+    counts = {}
+    lock = threading.Lock()
+    latency = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.lock:
+            self.counts[self.path] = self.counts.get(self.path, 0) + 1
+        time.sleep(self.latency)
+
+        if self.path.startswith("/imgbb"):
+            body = {"data": {"url": f"http://{self.headers['Host']}/images/{self.counts[self.path]}.jpg"}}
+        else:
+            body = {"success": True}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(latency):
+    StubHandler.latency = latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class ReplayCapture:
+    """Loop a recorded source forever and deliver frames at a fixed rate like a live camera"""
+
+    def __init__(self, cap, fps):
+        self.cap = cap
+        self.interval = 1 / fps
+        self.next_frame = time.monotonic()
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        delay = self.next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame = max(self.next_frame + self.interval, time.monotonic() - self.interval)
+
+        success, frame = self.cap.read()
+        if not success:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+        return success, frame
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def release(self):
+        self.cap.release()
+
+
+def cpu_seconds():
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(u.ru_utime + u.ru_stime for u in usage)
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[int(q * (len(values) - 1))], 1)
+
+
+def histogram_quantile(q, buckets, counts, count):
+    """Quantile estimated from cumulative bucket counts, like Prometheus' histogram_quantile"""
+    if not count:
+        return None
+    rank = q * count
+    lower, below = 0, 0
+    for bound, cumulative in zip(buckets, counts):
+        if cumulative >= rank:
+            in_bucket = cumulative - below
+            return lower + (bound - lower) * ((rank - below) / in_bucket if in_bucket else 1)
+        lower, below = bound, cumulative
+    return buckets[-1]
+
+
+def run_one(args):
+    """Child process: run the app for one configuration and write its measurements"""
+    server = start_stub_server(args.stub_latency_ms / 1000)
+    stub = f"http://127.0.0.1:{server.server_address[1]}"
+    workdir = tempfile.mkdtemp(prefix="elephant-bench-")
+
+    cameras = [
+        {"id": f"bench_{i}", "source": source, "location": f"Benchmark {i}"}
+        for i, source in zip(range(args.camera_count), itertools.cycle(os.path.abspath(s) for s in args.source))
+    ]
+    with open(os.path.join(workdir, "cameras.json"), "w") as f:
+        json.dump(cameras, f)
+    os.symlink(os.path.join(BACKEND_DIR, "model"), os.path.join(workdir, "model"))
+
+    # main reads its configuration at import time
+    os.environ.update({
+        "DATABASE_POST_API_ROUTE": f"{stub}/convex",
+        "DATABASE_BATCH_POST_API_ROUTE": f"{stub}/convex/batch",
+        "TELEGRAM_BOT_MESSAGE_API_ROUTE": f"{stub}/telegram",
+        "NOTIFICATIONS_API_ROUTE": f"{stub}/push",
+        "IMGBB_UPLOAD_URL": f"{stub}/imgbb",
+        "IMGBB_API_KEY": "benchmark",
+        "SNAPSHOT_STORAGE": "imgbb",
+        "CAMERAS_CONFIG": "cameras.json",
+        "OUTBOX_PATH": "outbox.db",
+        "INFERENCE_MAX_BATCH_SIZE": str(args.batch_size),
+        "SAMPLE_IDLE_FPS": str(args.sample_fps),
+        "SAMPLE_ACTIVE_FPS": str(args.sample_fps),
+        "MOTION_THRESHOLD": str(args.motion_threshold),
+        "CLIP_FPS": "0",
+    })
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+    import main
+    from fastapi.testclient import TestClient
+
+    open_capture = main.open_capture
+    def open_replay(camera_config):
+        cap, width, height = open_capture(camera_config)
+        fps = args.replay_fps or cap.get(cv2.CAP_PROP_FPS) or 15
+        return ReplayCapture(cap, fps), width, height
+    main.open_capture = open_replay
+
+    with TestClient(main.app) as client:
+        time.sleep(args.warmup)
+        frames_before = main.inference_scheduler.metrics()["frames"]
+        cpu_before, started = cpu_seconds(), time.monotonic()
+        time.sleep(args.duration)
+        elapsed = time.monotonic() - started
+        cpu = cpu_seconds() - cpu_before
+        frames = main.inference_scheduler.metrics()["frames"] - frames_before
+
+        camera_stats = client.get("/cameras/stats").json()
+        inference_ms = [
+            seconds * 1000 for counters in main.camera_stats.values() for _, seconds in list(counters.inferences)
+        ]
+        detection_latency = {}
+        with main.event_seconds.lock:
+            series = {milestone: (list(counts), total, count) for milestone, (counts, total, count) in main.event_seconds.series.items()}
+        for milestone, (counts, _, count) in series.items():
+            detection_latency[milestone] = {"count": count}
+            for q in (0.5, 0.95, 0.99):
+                seconds = histogram_quantile(q, main.latency_buckets, counts, count)
+                detection_latency[milestone][f"p{int(q * 100)}_ms"] = round(seconds * 1000, 1)
+
+        result = {
+            "cameras": args.camera_count,
+            "batch_size": args.batch_size,
+            "duration_s": round(elapsed, 1),
+            "inference_fps": round(frames / elapsed, 2),
+            "capture_fps": round(sum(stats["capture_fps"] for stats in camera_stats.values()), 2),
+            "dropped_frames": sum(stats["dropped_frames"] for stats in camera_stats.values()),
+            "inference_ms": {
+                "p50": percentile(inference_ms, 0.5),
+                "p95": percentile(inference_ms, 0.95),
+                "p99": percentile(inference_ms, 0.99),
+            },
+            "detection_latency": detection_latency,
+            "cpu_percent": round(cpu / elapsed * 100, 1),
+            "max_rss_mb": round(
+                max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024, 1
+            ),
+            "scheduler": main.inference_scheduler.metrics(),
+            "pipeline": main.detection_pipeline.metrics(),
+            "stub_requests": dict(StubHandler.counts),
+        }
+
+    with open(args.result_file, "w") as f:
+        json.dump(result, f)
+    server.shutdown()
+
+
+def run_configuration(args, camera_count, batch_size):
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        result_file = f.name
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child",
+        "--camera-count", str(camera_count), "--batch-size", str(batch_size), "--result-file", result_file,
+        "--duration", str(args.duration), "--warmup", str(args.warmup),
+        "--replay-fps", str(args.replay_fps), "--sample-fps", str(args.sample_fps),
+        "--motion-threshold", str(args.motion_threshold), "--stub-latency-ms", str(args.stub_latency_ms),
+    ]
+    for source in args.source:
+        command += ["--source", source]
+
+    print(f"Running {camera_count} camera(s), batch size {batch_size}...")
+    output = None if args.verbose else subprocess.DEVNULL
+    completed = subprocess.run(command, stdout=output, stderr=output)
+    try:
+        if completed.returncode != 0:
+            raise RuntimeError(f"benchmark run failed with exit code {completed.returncode}")
+        with open(result_file) as f:
+            return json.load(f)
+    finally:
+        os.remove(result_file)
+
+
+def check_gates(results, args):
+    """Compare the results with the absolute limits and the baseline report"""
+    failures = []
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {(r["cameras"], r["batch_size"]): r for r in json.load(f)["results"]}
+
+    for result in results:
+        name = f"{result['cameras']} camera(s), batch {result['batch_size']}"
+        p95 = result["inference_ms"]["p95"]
+        if args.min_fps and result["inference_fps"] < args.min_fps:
+            failures.append(f"{name}: {result['inference_fps']} fps below {args.min_fps}")
+        if args.max_p95_ms and p95 is not None and p95 > args.max_p95_ms:
+            failures.append(f"{name}: p95 inference {p95} ms above {args.max_p95_ms}")
+
+        previous = baseline.get((result["cameras"], result["batch_size"]))
+        if previous:
+            if result["inference_fps"] < previous["inference_fps"] * (1 - args.max_regression):
+                failures.append(f"{name}: {result['inference_fps']} fps vs baseline {previous['inference_fps']}")
+            old_p95 = previous["inference_ms"]["p95"]
+            if p95 is not None and old_p95 and p95 > old_p95 * (1 + args.max_regression):
+                failures.append(f"{name}: p95 inference {p95} ms vs baseline {old_p95}")
+    return failures
+
+
+def print_table(results):
+    print(f"{'cams':>4} {'batch':>5} {'inf fps':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'cpu %':>6} {'rss MB':>7} {'events':>6} {'dropped':>7}")
+    for r in results:
+        ms = r["inference_ms"]
+        print(
+            f"{r['cameras']:>4} {r['batch_size']:>5} {r['inference_fps']:>8} {ms['p50'] or '-':>7} {ms['p95'] or '-':>7} "
+            f"{ms['p99'] or '-':>7} {r['cpu_percent']:>6} {r['max_rss_mb']:>7} {r['pipeline']['submitted']:>6} {r['dropped_frames']:>7}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", action="append", required=True, help="video file or image directory, repeatable")
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1], help="camera counts to run")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds per configuration")
+    parser.add_argument("--warmup", type=float, default=10, help="seconds before measuring starts")
+    parser.add_argument("--replay-fps", type=float, default=0, help="replay rate, 0 uses the video's own rate (15 for images)")
+    parser.add_argument("--sample-fps", type=float, default=8, help="detector sampling rate per camera")
+    parser.add_argument("--motion-threshold", type=float, default=0, help="0 runs the detector on every sampled frame")
+    parser.add_argument("--stub-latency-ms", type=float, default=0, help="simulated response time of the stub services")
+    parser.add_argument("--report", default="benchmark_report.json")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.1, help="allowed relative fps/p95 regression vs the baseline")
+    parser.add_argument("--min-fps", type=float, default=0)
+    parser.add_argument("--max-p95-ms", type=float, default=0)
+    parser.add_argument("--verbose", action="store_true", help="show the backend's output")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--camera-count", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--batch-size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_one(args)
+        return 0
+
+    results = [
+        run_configuration(args, camera_count, batch_size)
+        for camera_count in args.cameras
+        for batch_size in args.batch_sizes
+    ]
+    print_table(results)
+
+    failures = check_gates(results, args)
+    with open(args.report, "w") as f:
+        json.dump({"results": results, "failures": failures}, f, indent=2)
+    print(f"Report written to {args.report}")
+
+    for failure in failures:
+        print(f"Regression gate failed: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
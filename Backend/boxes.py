@@ -0,0 +1,17 @@
+"""Box geometry shared by the backend and the model tooling; boxes are (x1, y1, x2, y2)."""
+
+
+def box_iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0
+
+
+def centroid_closeness(a, b):
+    """1 minus the centroid distance relative to the diagonal of box a, negative when far apart"""
+    dx = (a[0] + a[2] - b[0] - b[2]) / 2
+    dy = (a[1] + a[3] - b[1] - b[3]) / 2
+    diagonal = ((a[2] - a[0]) ** 2 + (a[3] - a[1]) ** 2) ** 0.5
+    return 1 - (dx * dx + dy * dy) ** 0.5 / diagonal if diagonal > 0 else -1
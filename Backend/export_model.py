@@ -0,0 +1,107 @@
+"""Export the trained detector for CPU inference and check it against the PyTorch model.
+
+    python export_model.py --format onnx
+    python export_model.py --format openvino
+    python export_model.py --format onnx --check-only
+
+The backend picks the exported model up with MODEL_BACKEND=onnx or
+MODEL_BACKEND=openvino. INT8 models are only produced by modelRuns/quantize.py,
+which refuses to publish one that loses too much mAP.
+"""
+import argparse
+import glob
+import os
+import sys
+
+from ultralytics import YOLO
+
+from boxes import box_iou
+
+DEFAULT_WEIGHTS = "./model/best.pt"
+DEFAULT_IMAGES = "../modelRuns/val_batch"
+
+# Exported models must match the PyTorch boxes this closely to pass the check
+MIN_BOX_IOU = 0.9
+MAX_CONFIDENCE_DELTA = 0.02
+
+
+def export_path(weights, export_format):
+    """Where ultralytics writes an export of the given weights"""
+    stem = os.path.splitext(weights)[0]
+    if export_format == "onnx":
+        return f"{stem}.onnx"
+    return f"{stem}_openvino_model"
+
+
+def export(weights, export_format, imgsz=640, batch=8):
+    """Export with a dynamic batch axis so the backend's batched inference keeps working"""
+    model = YOLO(weights)
+    exported = model.export(format=export_format, imgsz=imgsz, dynamic=True, batch=batch)
+    print(f"Exported {weights} to {exported}")
+    return exported
+
+
+def detections(model, image, conf):
+    result = model.predict(image, conf=conf, verbose=False)[0]
+    return [(row[:4], row[4], int(row[5])) for row in result.boxes.data.tolist()]
+
+
+def check_parity(weights, exported, images, conf=0.5, max_delta=MAX_CONFIDENCE_DELTA):
+    """Compare the exported model's boxes, classes and confidences with the PyTorch model.
+
+    Returns a list of mismatch descriptions, empty when the models agree.
+    """
+    reference = YOLO(weights)
+    candidate = YOLO(exported, task="detect")
+    mismatches = []
+
+    for image in images:
+        expected = detections(reference, image, conf)
+        actual = detections(candidate, image, conf)
+        unmatched = list(actual)
+        for box, confidence, cls in expected:
+            best = max(unmatched, key=lambda other: box_iou(box, other[0]), default=None)
+            if best is None or box_iou(box, best[0]) < MIN_BOX_IOU or best[2] != cls:
+                # Boxes right at the threshold may legitimately fall on either side
+                if confidence - conf > max_delta:
+                    mismatches.append(f"{image}: missing box {[round(v) for v in box]} ({confidence:.2f})")
+                continue
+            unmatched.remove(best)
+            if abs(best[1] - confidence) > max_delta:
+                mismatches.append(f"{image}: confidence {best[1]:.3f} vs {confidence:.3f}")
+        for box, confidence, _ in unmatched:
+            if confidence - conf > max_delta:
+                mismatches.append(f"{image}: extra box {[round(v) for v in box]} ({confidence:.2f})")
+
+    print(f"Checked {len(images)} images, {len(mismatches)} mismatches")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parser.add_argument("--format", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=8, help="largest batch the backend will send")
+    parser.add_argument("--images", default=DEFAULT_IMAGES, help="image directory for the parity check")
+    parser.add_argument("--check-only", action="store_true", help="skip the export, only run the parity check")
+    args = parser.parse_args()
+
+    if args.check_only:
+        exported = export_path(args.weights, args.format)
+    else:
+        exported = export(args.weights, args.format, args.imgsz, args.batch)
+
+    images = sorted(glob.glob(os.path.join(args.images, "*.jpg")))
+    if not images:
+        print(f"No images found in {args.images}, skipping parity check")
+        return 1 if args.check_only else 0
+
+    mismatches = check_parity(args.weights, exported, images)
+    for mismatch in mismatches:
+        print(f"  {mismatch}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+from ultralytics.engine.results import Results
+
+# Workers are spawned rather than forked so they never inherit the API's
+# threads, and they only import this module instead of the whole app.
+mp_context = multiprocessing.get_context("spawn")
+
+
+def worker_main(model_path, shm_name, torch_threads, conn):
+    """Inference process: hold one YOLO instance and serve batches from shared memory"""
+    import torch
+    from ultralytics import YOLO
+
+    torch.set_num_threads(torch_threads)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        model = YOLO(model_path, task="detect")
+        conn.send(("ready", dict(model.names)))
+    except Exception as e:
+        conn.send(("error", str(e)))
+        shm.close()
+        return
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        if isinstance(request, str):
+            # The parent moved to a larger shared memory block
+            shm.close()
+            shm = shared_memory.SharedMemory(name=request)
+            conn.send(("ok", None))
+            continue
+
+        try:
+            # Copy the frames out: the predictor keeps references to its last
+            # batch, and live views into shm.buf would make shm.close() fail
+            frames = [
+                np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset).copy()
+                for offset, shape in request
+            ]
+            results = model.predict(frames, conf=0.5, verbose=False)
+            # One float32 row per box: x1, y1, x2, y2, conf, cls
+            boxes = [r.boxes.data.cpu().numpy().astype(np.float32) for r in results]
+            del frames, results
+            conn.send(("ok", boxes))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+    shm.close()
+
+
+class ProcessInferenceWorker:
+    """Parent-side handle for one inference process.
+
+    Frames are copied into a shared memory block owned by this worker and only
+    their offsets and shapes cross the pipe; the worker answers with compact
+    box arrays which are turned back into ultralytics Results for the caller.
+    Batches larger than the block are sent in parts, and a frame that does not
+    fit on its own makes the block grow.
+    """
+
+    def __init__(self, model_path, shm_bytes, torch_threads=1):
+        self.model_path = model_path
+        self.shm_bytes = shm_bytes
+        self.torch_threads = torch_threads
+        self.shm = None
+        self.conn = None
+        self.process = None
+        self.names = None
+
+    def start(self):
+        self.shm = shared_memory.SharedMemory(create=True, size=self.shm_bytes)
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(
+            target=worker_main,
+            args=(self.model_path, self.shm.name, self.torch_threads, child_conn),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+        state, payload = self.conn.recv()
+        if state != "ready":
+            self.close()
+            raise RuntimeError(f"Inference worker failed to load model: {payload}")
+        self.names = payload
+        print(f"Inference worker {self.process.pid} ready")
+
+    def restart(self):
+        """Replace a worker process that died, e.g. killed for running out of memory"""
+        print(f"Inference worker {self.process.pid} exited with code {self.process.exitcode}, restarting")
+        self.close()
+        self.start()
+
+    def predict(self, frames):
+        """Run a batch in the worker process, returns one Results per frame"""
+        if not self.process.is_alive():
+            self.restart()
+        
+        parts = [[]]
+        used = 0
+        for frame in frames:
+            if frame.nbytes > self.shm_bytes:
+                self._grow(frame.nbytes)
+            if parts[-1] and used + frame.nbytes > self.shm_bytes:
+                parts.append([])
+                used = 0
+            parts[-1].append(frame)
+            used += frame.nbytes
+        return [result for part in parts for result in self._predict(part)]
+
+    def _predict(self, frames):
+        request = []
+        offset = 0
+        for frame in frames:
+            np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)[...] = frame
+            request.append((offset, frame.shape))
+            offset += frame.nbytes
+
+        payload = self._request(request)
+        return [
+            Results(orig_img=frame, path="", names=self.names, boxes=boxes)
+            for frame, boxes in zip(frames, payload)
+        ]
+
+    def _grow(self, size):
+        """Move the worker to a shared memory block of size bytes, e.g. for a 4K camera"""
+        print(f"Inference worker {self.process.pid} shared memory grows from {self.shm_bytes} to {size} bytes")
+        old = self.shm
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.shm_bytes = size
+        # The worker keeps its own mapping of the old block until it switches over
+        old.close()
+        old.unlink()
+        self._request(self.shm.name)
+
+    def _request(self, request):
+        try:
+            self.conn.send(request)
+            state, payload = self.conn.recv()
+        except (EOFError, OSError) as e:
+            # The process died mid-batch; fail this batch and bring up a fresh one
+            self.process.join(timeout=5)
+            self.restart()
+            raise RuntimeError(f"Inference worker died during a batch: {e!r}")
+        if state != "ok":
+            raise RuntimeError(f"Inference worker error: {payload}")
+        return payload
+
+    def close(self):
+        if self.process is not None and self.process.is_alive():
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+def default_process_count():
+    return max(1, (os.cpu_count() or 1) // 2)
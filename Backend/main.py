@@ -1,24 +1,39 @@
-from fastapi import FastAPI, status, HTTPException
+from fastapi import FastAPI, status, HTTPException, Request
+from pydantic import BaseModel, Field
+from typing import Optional, Union
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from ultralytics import YOLO
+from ultralytics.engine.results import Results
+from inference_worker import ProcessInferenceWorker, default_process_count
+from boxes import box_iou, centroid_closeness
 import cv2
+import numpy as np
 import os
-import requests
+import httpx
 from datetime import datetime
 import threading
+import sys
 import time
 from dotenv import load_dotenv
-from contextlib import asynccontextmanager
-import hashlib
+from contextlib import asynccontextmanager, contextmanager
 import json
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict, deque
 import queue
+import random
+import re
+import hashlib
+import zipfile
+import sqlite3
+from array import array
 
 load_dotenv()
 
 DATABASE_POST_API_ROUTE= os.getenv("DATABASE_POST_API_ROUTE")
+# Optional bulk-insert route; when unset, records are posted one by one
+DATABASE_BATCH_POST_API_ROUTE = os.getenv("DATABASE_BATCH_POST_API_ROUTE")
 
 if not DATABASE_POST_API_ROUTE:
     raise ValueError("Environment variables DATABASE_POST_API_ROUTE and CONVEX_DEPLOYMENT must be set.")
@@ -26,35 +41,224 @@ if not DATABASE_POST_API_ROUTE:
 
 # Global variables
 model = None
+# Inference runtime: "pytorch", "onnx" (ONNX Runtime) or "openvino"; exported with export_model.py
+model_backend = os.getenv("MODEL_BACKEND", "pytorch").lower()
+model_precision = os.getenv("MODEL_PRECISION", "fp32").lower()  # "int8" selects the OpenVINO model published by modelRuns/quantize.py
+model_weights = "./model/best.pt"
+model_paths = {
+    ("pytorch", "fp32"): model_weights,
+    ("onnx", "fp32"): "./model/best.onnx",
+    ("openvino", "fp32"): "./model/best_openvino_model",
+    ("openvino", "int8"): "./model/best_int8_openvino_model",
+}
+if (model_backend, model_precision) not in model_paths:
+    raise ValueError(f"Unsupported MODEL_BACKEND/MODEL_PRECISION: {model_backend}/{model_precision}")
+model_path = os.getenv("MODEL_PATH") or model_paths[(model_backend, model_precision)]
+class_names = {}
 active_cameras = {}
-detection_results = []
-recent_detections = set()
+# Camera registry: config file plus the capture worker running for each camera
+cameras_config_path = os.getenv("CAMERAS_CONFIG", "cameras.json")
+main_camera_id = os.getenv("MAIN_CAMERA_ID", "camera_1")
+# Camera ids end up in file names and URLs
+camera_id_pattern = r"^[A-Za-z0-9_-]{1,64}$"
+default_cameras = [
+    {"id": "camera_1", "source": 0, "location": "Main Entrance"},
+]
+camera_workers = {}
+stopping_workers = {}  # removed cameras whose capture thread may still hold the device
+camera_stop_timeout = 10
+camera_registry_lock = threading.Lock()
+# Recent detections kept in memory for /detections, oldest overwritten first
+detection_history_size = int(os.getenv("DETECTION_HISTORY_SIZE", 1000))
+detection_history_max_limit = 500  # most records one /detections call returns
+# Server-sent event push of new detections to dashboards
+detection_stream_queue_size = int(os.getenv("DETECTION_STREAM_QUEUE_SIZE", 100))  # events buffered per client
+detection_stream_keepalive = 15  # seconds between keep-alive comments on an idle stream
+# Per-camera elephant tracks; uploads and notifications fire once per track
+track_iou_threshold = 0.3
+track_min_hits = int(os.getenv("TRACK_MIN_HITS", 2))  # detections needed before a track is announced
+track_max_age = float(os.getenv("TRACK_MAX_AGE", 15))  # seconds a track survives without a matching detection
+trackers = {}
+# Re-acquired tracks in the same area within the cooldown are treated as the same elephant
 detection_cooldown = 20
+dedup_grid = 4  # frame is split into a 4x4 grid of areas
+dedup_max_entries = 10000
 # New: Track last upload time per camera
 last_upload_time = {}
 upload_interval = 10  # 10 seconds between uploads
 executor = ThreadPoolExecutor(max_workers=4)
+# Event loop the API runs on; camera threads publish live frames onto it
+main_loop = None
+# Per-camera live frame broadcasters feeding the stream endpoints
+broadcasters = {}
+stream_interval = 0.033  # ~30 fps cap for annotated live frames
+# Batched inference shared by all camera loops
+inference_max_batch_size = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 8))
+inference_max_wait = float(os.getenv("INFERENCE_MAX_WAIT_MS", 20)) / 1000  # seconds the first frame may wait for a batch
+inference_timeout = float(os.getenv("INFERENCE_TIMEOUT", 30))  # seconds a camera waits for its results
+# "thread" runs the model in this process, "process" starts one YOLO instance per worker process
+inference_mode = os.getenv("INFERENCE_MODE", "thread")
+inference_processes = int(os.getenv("INFERENCE_PROCESSES", default_process_count()))
+inference_shm_frame_bytes = int(os.getenv("INFERENCE_SHM_FRAME_BYTES", 1920 * 1080 * 3))
+inference_workers = []
+# Motion gating: only run the detector when the scene changed
+motion_threshold = float(os.getenv("MOTION_THRESHOLD", 0.01))  # fraction of changed pixels that counts as motion
+motion_force_interval = float(os.getenv("MOTION_FORCE_INTERVAL", 30))  # seconds between forced inferences on a static scene
+motion_gates = {}
+# Adaptive sampling: how often each camera hands its freshest frame to the detector
+sample_idle_fps = float(os.getenv("SAMPLE_IDLE_FPS", 2))
+sample_active_fps = float(os.getenv("SAMPLE_ACTIVE_FPS", 8))
+if sample_idle_fps <= 0 or sample_active_fps <= 0:
+    raise ValueError("SAMPLE_IDLE_FPS and SAMPLE_ACTIVE_FPS must be positive.")
+sample_max_backoff = 8  # slow down at most 8x while the inference queue is saturated
+tracking_hold = 10  # a camera counts as tracking for 10 seconds after an elephant was seen
+samplers = {}
+# Capture threads holding the newest decoded frame of each camera
+captures = {}
+# Rolling per-camera throughput and health counters behind /cameras/stats
+camera_stats = {}
+camera_stats_window = 10  # seconds the fps figures are averaged over
+# Capture backend defaults, each camera can override them in the registry
+capture_backend = os.getenv("CAPTURE_BACKEND", "opencv")  # opencv, ffmpeg or gstreamer
+capture_width = int(os.getenv("CAPTURE_WIDTH", 0)) or None  # decode/scale to this width, keeps aspect if no height
+capture_height = int(os.getenv("CAPTURE_HEIGHT", 0)) or None
+capture_hw_decode = os.getenv("CAPTURE_HW_DECODE", "0") == "1"
+# GStreamer hardware decoding: a platform preset, or a full decode fragment that replaces it
+capture_gst_hw = os.getenv("CAPTURE_GST_HW", "vaapi")  # vaapi or nvidia
+capture_gst_codec = os.getenv("CAPTURE_GST_CODEC", "h264")  # codec of RTSP streams, h264 or h265
+capture_gst_decode = os.getenv("CAPTURE_GST_DECODE", "")  # e.g. "rtph264depay ! h264parse ! nvv4l2decoder ! nvvidconv"
+# (decoder, scaler, output caps) per platform; the scaler resizes before frames reach system memory
+gst_hw_decoders = {
+    # vaapipostproc scales on the GPU and downloads to system memory when videoconvert follows
+    "vaapi": ("vaapidecodebin", "vaapipostproc", "video/x-raw"),
+    # nvv4l2decoder outputs NVMM buffers, only nvvidconv can scale and copy them out
+    "nvidia": ("nvv4l2decoder", "nvvidconv", "video/x-raw,format=BGRx"),
+}
+if capture_gst_hw not in gst_hw_decoders:
+    raise ValueError(f"Unsupported CAPTURE_GST_HW: {capture_gst_hw}")
+# Pre/post-event clips recorded from a per-camera ring of recent JPEG frames
+clip_fps = float(os.getenv("CLIP_FPS", 5))  # 0 disables clip recording
+clip_seconds_before = float(os.getenv("CLIP_SECONDS_BEFORE", 5))
+clip_seconds_after = float(os.getenv("CLIP_SECONDS_AFTER", 5))
+clip_buffer_bytes = int(os.getenv("CLIP_BUFFER_BYTES", 32 * 1024 ** 2))  # per camera
+clip_jpeg_quality = 70
+clip_buffers = {}
+clip_tasks = set()
+clip_executor = ThreadPoolExecutor(max_workers=1)
+
+# Shared HTTP client for Convex, Telegram, push and imgbb calls
+http_client = None
+http_timeout = float(os.getenv("HTTP_TIMEOUT", 10))
+http_max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", 20))
+http_per_host_limit = int(os.getenv("HTTP_PER_HOST_LIMIT", 4))  # concurrent requests per host
+host_semaphores = {}
+
+# Detection event pipeline: annotate -> encode -> upload -> notify
+pipeline_queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", 32))
+pipeline_overflow_policy = os.getenv("PIPELINE_OVERFLOW_POLICY", "merge")  # drop_newest, drop_oldest or merge
+pipeline_workers = {
+    "annotate": int(os.getenv("PIPELINE_ANNOTATE_WORKERS", 1)),
+    "encode": int(os.getenv("PIPELINE_ENCODE_WORKERS", 1)),
+    "upload": int(os.getenv("PIPELINE_UPLOAD_WORKERS", 2)),
+    "notify": int(os.getenv("PIPELINE_NOTIFY_WORKERS", 2)),
+}
+
+# Durable outbox for detection uploads
+outbox_path = os.getenv("OUTBOX_PATH", "outbox.db")
+outbox_batch_size = int(os.getenv("OUTBOX_BATCH_SIZE", 20))
+outbox_base_backoff = 5  # seconds before the first retry, doubled on each failure
+outbox_max_backoff = 600  # never wait more than 10 minutes between retries
+outbox_max_attempts = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 20))  # records failing this often are parked as dead
+outbox_poll_interval = 30
+outbox_flush_interval = float(os.getenv("OUTBOX_FLUSH_INTERVAL", 2))  # seconds a partial batch waits for more records
+outbox_wakeup = None
+outbox_drainer = None
+
+# Snapshot storage: "imgbb" uploads each snapshot, "local" serves it from /snapshots/ on this node
+snapshot_storage = os.getenv("SNAPSHOT_STORAGE", "imgbb")
+imgbb_upload_url = os.getenv("IMGBB_UPLOAD_URL", "https://api.imgbb.com/1/upload")
+public_base_url = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+if snapshot_storage == "local" and not public_base_url:
+    raise ValueError("PUBLIC_BASE_URL must be set when SNAPSHOT_STORAGE is \"local\".")
+snapshot_name_pattern = re.compile(r"^[0-9a-f]{64}\.jpg$")
+
+# Snapshot retention: thumbnails, packing into daily archives, age and size limits
+snapshot_max_bytes = int(os.getenv("SNAPSHOT_MAX_BYTES", 2 * 1024 ** 3))
+snapshot_max_age = float(os.getenv("SNAPSHOT_MAX_AGE_DAYS", 30)) * 86400
+snapshot_pack_after = float(os.getenv("SNAPSHOT_PACK_AFTER_HOURS", 24)) * 3600
+snapshot_thumbnails = os.getenv("SNAPSHOT_THUMBNAILS", "1") == "1"
+snapshot_thumbnail_width = 320
+retention_executor = ThreadPoolExecutor(max_workers=1)  # packing and pruning stay off the shared executor
+snapshot_retention_interval = 300  # seconds between retention passes
+retention_task = None
 
 # Create snapshots directory
 snapshot_dir = "snapshots"
-if not os.path.exists(snapshot_dir):
-    os.makedirs(snapshot_dir)
+thumbnail_dir = os.path.join(snapshot_dir, "thumbs")
+archive_dir = os.path.join(snapshot_dir, "archive")
+clip_dir = "clips"
+for directory in (snapshot_dir, thumbnail_dir, archive_dir, clip_dir):
+    if not os.path.exists(directory):
+        os.makedirs(directory)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global model
+    global model, main_loop, class_names, http_client, outbox_wakeup, outbox_drainer, retention_task
+    main_loop = asyncio.get_running_loop()
     try:
-        model = YOLO("./model/best.pt")
-        print("YOLO model loaded successfully")
+        if inference_mode == "process":
+            torch_threads = max(1, (os.cpu_count() or 1) // inference_processes)
+            for _ in range(inference_processes):
+                worker = ProcessInferenceWorker(
+                    model_path, inference_max_batch_size * inference_shm_frame_bytes, torch_threads
+                )
+                inference_workers.append(worker)
+                await asyncio.get_running_loop().run_in_executor(executor, worker.start)
+            class_names = inference_workers[0].names
+            print(f"Started {len(inference_workers)} inference worker processes")
+        else:
+            model = YOLO(model_path, task="detect")
+            class_names = model.names
+            print(f"YOLO model loaded successfully ({model_backend}, {model_precision})")
     except Exception as e:
         print(f"Failed to load YOLO model: {str(e)}")
+        for worker in inference_workers:
+            worker.close()
         raise
     
+    if inference_workers:
+        inference_scheduler.start([worker.predict for worker in inference_workers])
+    else:
+        inference_scheduler.start([predict_batch])
+    http_client = httpx.AsyncClient(
+        timeout=http_timeout,
+        limits=httpx.Limits(max_connections=http_max_connections, max_keepalive_connections=http_max_connections),
+    )
+    outbox.open()
+    outbox_wakeup = asyncio.Event()
+    outbox_drainer = asyncio.create_task(drain_outbox())
+    snapshot_retention.load_index()
+    retention_task = asyncio.create_task(run_snapshot_retention())
+    detection_pipeline.start()
     await start_camera_monitoring()
     yield
     
     print("Shutting down camera monitoring...")
-    for camera_id, cap in active_cameras.items():
+    for camera_id in list(camera_workers):
+        stop_camera(camera_id)
+    detection_stream.close()
+    inference_scheduler.stop()
+    await detection_pipeline.stop()
+    outbox_drainer.cancel()
+    retention_task.cancel()
+    await asyncio.gather(outbox_drainer, retention_task, return_exceptions=True)
+    outbox.close()
+    clip_executor.shutdown(wait=True)
+    retention_executor.shutdown(wait=True)
+    await http_client.aclose()
+    for worker in inference_workers:
+        worker.close()
+    for camera_id, cap in list(active_cameras.items()):
         if cap:
             cap.release()
     executor.shutdown(wait=True)
@@ -70,36 +274,125 @@ app.add_middleware(
 )
 
 
-async def upload_to_convex(data):
+class Histogram:
+    """Minimal Prometheus histogram with labels, rendered in the text exposition format"""
+
+    def __init__(self, name, description, label, buckets):
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}  # label value -> [bucket counts, sum, count]
+
+    def observe(self, label_value, value):
+        with self.lock:
+            series = self.series.setdefault(label_value, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_value, (counts, total, count) in sorted(self.series.items()):
+                labels = f'{self.label}="{label_value}"'
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{labels}}} {total}")
+                lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return "\n".join(lines)
+
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+stage_seconds = Histogram(
+    "elephant_detection_stage_seconds", "Time spent in each stage of a detection event", "stage", latency_buckets
+)
+event_seconds = Histogram(
+    "elephant_detection_latency_seconds", "Time from frame capture to each milestone of a detection event", "milestone",
+    latency_buckets
+)
+
+def record_stage(timings, stage, seconds):
+    """Observe a stage duration and add it to an event's timings, if there is one"""
+    stage_seconds.observe(stage, seconds)
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0) + seconds
+
+@contextmanager
+def timed(timings, stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(timings, stage, time.perf_counter() - started)
+
+async def http_post(url, **kwargs):
+    """POST through the shared keep-alive client, limited per host"""
+    host = httpx.URL(url).host
+    semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(http_per_host_limit))
+    async with semaphore:
+        return await http_client.post(url, **kwargs)
+
+def route_reported_failure(res):
+    """True when a Next.js API route replied with {"success": false}"""
+    if not res.headers.get("content-type", "").startswith("application/json"):
+        return False
+    body = res.json()
+    return isinstance(body, dict) and body.get("success") is False
+
+async def upload_to_convex(data, idempotency_key=None, timings=None):
+    """Post a detection record, returns True once Convex accepted it"""
     try:
         payload = json.dumps(data)
-        loop = asyncio.get_event_loop()
-        res = await loop.run_in_executor(
-            executor,
-            lambda: requests.post(DATABASE_POST_API_ROUTE, payload)
-        )
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        with timed(timings, "upload_convex"):
+            res = await http_post(DATABASE_POST_API_ROUTE, content=payload, headers=headers)
         res.raise_for_status()
         if res.status_code != status.HTTP_200_OK:
             raise HTTPException(status_code=res.status_code, detail=res.text)
+        # The Next.js route answers 200 even when the mutation failed
+        if route_reported_failure(res):
+            raise HTTPException(status_code=500, detail=res.text)
 
         print("Data uploaded to Convex successfully")
+        return True
     except Exception as e:
         print(f"Failed to upload to Convex: {e}")
+        return False
+
+async def upload_batch_to_convex(records, timings=None):
+    """Post several detection records in one bulk insert, returns True once Convex accepted them.
 
-async def push_notification(data):
+    timings holds one dict per record; each record waited for the whole insert.
+    """
+    try:
+        started = time.perf_counter()
+        try:
+            res = await http_post(DATABASE_BATCH_POST_API_ROUTE, json={"records": records})
+        finally:
+            for record_timings in timings or [None]:
+                record_stage(record_timings, "upload_convex_batch", time.perf_counter() - started)
+        res.raise_for_status()
+        if route_reported_failure(res):
+            raise HTTPException(status_code=500, detail=res.text)
+
+        print(f"Uploaded {len(records)} records to Convex")
+        return True
+    except Exception as e:
+        print(f"Failed to upload batch to Convex: {e}")
+        return False
+
+async def push_notification(data, timings=None):
     try:
-        loop = asyncio.get_event_loop()
         # send message to telegram 
         payload = {
             'message': f"Elephant detected at {data['location']} with {data['confidence']:.1%} confidence.",
         }
-        res = await loop.run_in_executor(
-            executor,
-            lambda: requests.post(
-                os.getenv("TELEGRAM_BOT_MESSAGE_API_ROUTE"),
-                json=payload
-            )
-        )
+        with timed(timings, "notify_telegram"):
+            res = await http_post(os.getenv("TELEGRAM_BOT_MESSAGE_API_ROUTE"), json=payload)
         res.raise_for_status()
         if res.status_code != status.HTTP_200_OK:
             raise HTTPException(status_code=res.status_code, detail=res.text)
@@ -115,14 +408,12 @@ async def push_notification(data):
         # Use proper push notification endpoint
         push_notification_url = os.getenv("NOTIFICATIONS_API_ROUTE")
         
-        res = await loop.run_in_executor(
-            executor,
-            lambda: requests.post(
+        with timed(timings, "notify_push"):
+            res = await http_post(
                 push_notification_url,
-                data=notification_payload,
+                content=notification_payload,
                 headers={'Content-Type': 'application/json'}
             )
-        )
         res.raise_for_status()
         if res.status_code != status.HTTP_200_OK:
             raise HTTPException(status_code=res.status_code, detail=res.text)
@@ -131,55 +422,807 @@ async def push_notification(data):
     except Exception as e:
         print(f"Failed to send push notification: {e}")
 
-async def upload_to_imgbb(imgpath):
+async def upload_to_imgbb(imgpath, timings=None):
     """Upload image to imgbb and return URL"""
     try:
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         
-        def upload_request():
+        def read_image():
             with open(imgpath, 'rb') as img_file:
-                response = requests.post(
-                    "https://api.imgbb.com/1/upload",
-                    params={"key": os.getenv("IMGBB_API_KEY")},
-                    files={"image": img_file}
-                )
-                response.raise_for_status()
-                return response.json().get("data", {}).get("url", "")
+                return img_file.read()
         
-        return await loop.run_in_executor(executor, upload_request)
+        img_bytes = await loop.run_in_executor(executor, read_image)
+        with timed(timings, "upload_imgbb"):
+            response = await http_post(
+                imgbb_upload_url,
+                params={"key": os.getenv("IMGBB_API_KEY")},
+                files={"image": (os.path.basename(imgpath), img_bytes)}
+            )
+        response.raise_for_status()
+        return response.json().get("data", {}).get("url", "")
     except Exception as e:
         print(f"Failed to upload image to imgbb: {e}")
         return ""
 
-def create_detection_hash(frame, boxes):
-    """Create a hash to identify similar detections"""
-    height, width = frame.shape[:2]
-    box_data = ""
-    
-    for box in boxes:
-        x1, y1, x2, y2 = box.xyxy[0]
-        box_data += f"{int(x1)}{int(y1)}{int(x2)}{int(y2)}"
-    
-    combined_data = f"{width}x{height}_{box_data}_{datetime.now().strftime('%Y%m%d%H%M')}"
-    return hashlib.md5(combined_data.encode()).hexdigest()
+class CameraConfig(BaseModel):
+    id: str = Field(pattern=camera_id_pattern)
+    source: Union[int, str]  # device index or stream URL (RTSP/HTTP)
+    location: str
+    backend: Optional[str] = None  # opencv, ffmpeg or gstreamer, defaults to CAPTURE_BACKEND
+    width: Optional[int] = None
+    height: Optional[int] = None
+    hw_decode: Optional[bool] = None
 
-def is_duplicate_detection(detection_hash):
-    """Check if this detection already exists recently"""
-    current_time = time.time()
-    
-    expired_hashes = []
-    for stored_hash, timestamp in list(recent_detections):
-        if current_time - timestamp > detection_cooldown:
-            expired_hashes.append((stored_hash, timestamp))
-    
-    for expired in expired_hashes:
-        recent_detections.discard(expired)
-    
-    for stored_hash, timestamp in recent_detections:
-        if stored_hash == detection_hash:
+class FrameBroadcaster:
+    """Fan out the latest annotated JPEG of one camera to any number of viewers.
+
+    The camera's monitor thread is the only producer. Each viewer gets a
+    single-slot queue, so a slow client only ever skips to the newest frame
+    instead of queueing up old ones or slowing down the producer.
+    """
+
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+        self.subscribers = set()
+        self.latest = None
+
+    @property
+    def viewer_count(self):
+        return len(self.subscribers)
+
+    def publish(self, jpeg_bytes):
+        """Publish a frame from the capture thread"""
+        self.latest = jpeg_bytes
+        if self.subscribers and main_loop is not None:
+            main_loop.call_soon_threadsafe(self._fan_out, jpeg_bytes)
+
+    def _fan_out(self, jpeg_bytes):
+        for slot in list(self.subscribers):
+            if slot.full():
+                slot.get_nowait()
+            slot.put_nowait(jpeg_bytes)
+
+    async def frames(self):
+        """Yield multipart MJPEG chunks until the client disconnects"""
+        slot = asyncio.Queue(maxsize=1)
+        if self.latest is not None:
+            slot.put_nowait(self.latest)
+        self.subscribers.add(slot)
+        try:
+            while True:
+                jpeg_bytes = await slot.get()
+                if jpeg_bytes is None:
+                    break
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n')
+        finally:
+            self.subscribers.discard(slot)
+
+    def close(self):
+        """End every open stream, e.g. when the camera is removed"""
+        if main_loop is not None:
+            main_loop.call_soon_threadsafe(self._fan_out, None)
+
+class InferenceScheduler:
+    """Collect frames from every camera loop and run them through the model in batches.
+
+    A batch is closed when it reaches max_batch_size or when the oldest frame
+    in it has waited max_wait seconds, whichever comes first. Each runner is a
+    callable taking a list of frames and returning one result per frame; every
+    runner gets its own dispatch thread.
+    """
+
+    def __init__(self, max_batch_size, max_wait):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.pending = queue.Queue()
+        self.threads = []
+        self.stopped = False
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.frames = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    def start(self, runners):
+        self.stopped = False
+        for runner in runners:
+            thread = threading.Thread(target=self._dispatch, args=(runner,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.stopped = True
+        for _ in self.threads:
+            self.pending.put(None)
+        for thread in self.threads:
+            thread.join(timeout=5)
+        self.threads = []
+        
+        # Frames queued behind the stop sentinels are never dispatched
+        while True:
+            try:
+                item = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[3].set_exception(RuntimeError("Inference scheduler stopped"))
+
+    def submit(self, camera_id, frame):
+        """Queue a frame and return a Future resolving to its results list"""
+        future = Future()
+        if self.stopped:
+            future.set_exception(RuntimeError("Inference scheduler stopped"))
+            return future
+        self.pending.put((camera_id, frame, time.monotonic(), future))
+        return future
+
+    def predict(self, camera_id, frame, timings=None):
+        """Blocking helper for camera threads, records queue wait and inference time"""
+        future = self.submit(camera_id, frame)
+        results = future.result(timeout=inference_timeout)
+        queue_wait, inference = future.timings
+        record_stage(timings, "inference_queue", queue_wait)
+        record_stage(timings, "inference", inference)
+        return results
+
+    def queue_depth(self):
+        return self.pending.qsize()
+
+    def saturated(self):
+        """True when more frames are waiting than the dispatch threads can take in one round"""
+        return self.queue_depth() >= self.max_batch_size * max(1, len(self.threads))
+
+    def _collect(self):
+        item = self.pending.get()
+        if item is None:
+            return None
+        
+        batch = [item]
+        deadline = item[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Leave the stop sentinel for the next collect call
+                self.pending.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _dispatch(self, runner):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            
+            started = time.monotonic()
+            try:
+                results = runner([frame for _, frame, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"Runner returned {len(results)} results for {len(batch)} frames")
+            except Exception as e:
+                for _, _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            finished = time.monotonic()
+            waits = [started - submitted for _, _, submitted, _ in batch]
+            # Route each result back to the camera that submitted the frame
+            for (_, _, submitted, future), result in zip(batch, results):
+                future.timings = (started - submitted, finished - started)
+                future.set_result([result])
+            
+            with self.lock:
+                self.batches += 1
+                self.frames += len(batch)
+                self.queue_wait_total += sum(waits)
+                self.queue_wait_max = max(self.queue_wait_max, max(waits))
+
+    def metrics(self):
+        with self.lock:
+            batches, frames = self.batches, self.frames
+            mean_batch_size = frames / batches if batches else 0
+            return {
+                "batches": batches,
+                "frames": frames,
+                "mean_batch_size": round(mean_batch_size, 2),
+                "mean_batch_fill": round(mean_batch_size / self.max_batch_size, 3),
+                "mean_queue_wait_ms": round(self.queue_wait_total / frames * 1000, 2) if frames else 0,
+                "max_queue_wait_ms": round(self.queue_wait_max * 1000, 2),
+                "queue_depth": self.queue_depth(),
+            }
+
+class MotionGate:
+    """Cheap per-camera scene-change filter run before the detector.
+
+    Frames are downscaled, blurred and compared against a running-average
+    background. Inference is skipped unless enough pixels changed, an elephant
+    was seen recently, or force_interval seconds passed since the last run.
+    """
+
+    def __init__(self, threshold, force_interval, width=160):
+        self.threshold = threshold
+        self.force_interval = force_interval
+        self.width = width
+        self.background = None
+        self.last_inference = 0
+        self.checked = 0
+        self.skipped = 0
+        self.forced = 0
+
+    def should_infer(self, frame, now, tracking=False):
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, height * self.width // width)), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        self.checked += 1
+        
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            motion = True
+        else:
+            diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+            _, mask = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)
+            motion = cv2.countNonZero(mask) / mask.size >= self.threshold
+            cv2.accumulateWeighted(gray, self.background, 0.05)
+        
+        if not (motion or tracking):
+            if now - self.last_inference < self.force_interval:
+                self.skipped += 1
+                return False
+            self.forced += 1
+        
+        self.last_inference = now
+        return True
+
+    def stats(self):
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "forced": self.forced,
+            "skip_ratio": round(self.skipped / self.checked, 3) if self.checked else 0,
+        }
+
+class ClipBuffer:
+    """Ring of one camera's recent JPEG-encoded frames, bounded by total bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.frames = deque()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def add(self, timestamp, jpeg_bytes):
+        with self.lock:
+            self.frames.append((timestamp, jpeg_bytes))
+            self.bytes += len(jpeg_bytes)
+            while self.bytes > self.max_bytes and self.frames:
+                _, dropped = self.frames.popleft()
+                self.bytes -= len(dropped)
+
+    def between(self, start, end):
+        with self.lock:
+            return [(timestamp, jpeg_bytes) for timestamp, jpeg_bytes in self.frames if start <= timestamp <= end]
+
+class CameraStats:
+    """Rolling throughput and health counters for one camera.
+
+    The capture and watch loops only append timestamps and durations to
+    bounded deques or bump counters; rates and percentiles are computed when
+    the stats are read.
+    """
+
+    def __init__(self, window, max_samples=1024):
+        self.window = window
+        self.started = time.time()
+        self.captured = deque(maxlen=max_samples)
+        self.inferences = deque(maxlen=max_samples)  # (timestamp, seconds)
+        self.dropped_frames = 0
+        self.read_failures = 0
+        self.last_frame_time = 0
+
+    def frame_captured(self, now):
+        self.captured.append(now)
+        self.last_frame_time = now
+
+    def frames_dropped(self, count):
+        """Frames lost because the watch loop was busy when it should have taken them"""
+        self.dropped_frames += count
+
+    def read_failed(self):
+        self.read_failures += 1
+
+    def inferred(self, now, seconds):
+        self.inferences.append((now, seconds))
+
+    def rate(self, timestamps, now):
+        window = min(self.window, now - self.started)
+        if window <= 0:
+            return 0
+        return round(sum(1 for t in timestamps if now - t <= self.window) / window, 2)
+
+    def stats(self):
+        now = time.time()
+        inferences = list(self.inferences)
+        durations = sorted(seconds for _, seconds in inferences)
+        return {
+            "capture_fps": self.rate(list(self.captured), now),
+            "inference_fps": self.rate([t for t, _ in inferences], now),
+            "dropped_frames": self.dropped_frames,
+            "mean_inference_ms": round(sum(durations) / len(durations) * 1000, 1) if durations else None,
+            "p95_inference_ms": round(durations[int(0.95 * (len(durations) - 1))] * 1000, 1) if durations else None,
+            "read_failures": self.read_failures,
+            "last_frame_age_ms": round((now - self.last_frame_time) * 1000, 1) if self.last_frame_time else None,
+        }
+
+class ImageDirectoryCapture:
+    """cv2.VideoCapture stand-in replaying the images of a directory in name order"""
+
+    image_suffixes = (".jpg", ".jpeg", ".png", ".bmp")
+
+    def __init__(self, path):
+        self.paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(self.image_suffixes)
+        )
+        self.index = 0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def read(self):
+        while self.index < len(self.paths):
+            frame = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return len(self.paths)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.index
+        return 0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.index = int(value)
             return True
-    
-    return False
+        return False
+
+    def release(self):
+        self.paths = []
+
+class LatestFrameCapture:
+    """Read a camera continuously in its own thread and keep only the newest frame.
+
+    Consumers never see OpenCV's internal buffer: they get the most recent
+    decoded frame with its capture timestamp and sequence number, so a slow
+    consumer skips frames instead of falling behind. Only frames a consumer
+    takes are downscaled, and they come with the full resolution frame they
+    were made from, so a snapshot can be taken from exactly the inferred frame.
+    """
+
+    def __init__(self, cap, camera_id, width=None, height=None, counters=None):
+        self.cap = cap
+        self.camera_id = camera_id
+        self.counters = counters
+        self.width = width
+        self.height = height
+        self.condition = threading.Condition()
+        self.frame = None
+        self.timestamp = 0
+        self.seq = 0
+        self.failed = False
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped = True
+        self.thread.join(timeout=5)
+
+    def _run(self):
+        while not self.stopped:
+            success, frame = self.cap.read()
+            with self.condition:
+                if not success:
+                    self.failed = True
+                    if self.counters:
+                        self.counters.read_failed()
+                    self.condition.notify_all()
+                    break
+                self.frame = frame
+                self.timestamp = time.time()
+                self.seq += 1
+                self.condition.notify_all()
+            if self.counters:
+                self.counters.frame_captured(self.timestamp)
+
+    def latest(self, after_seq, timeout=1.0):
+        """Return (frame, full_frame, timestamp, seq) newer than after_seq, or None on timeout/failure.
+
+        full_frame is None unless the frame had to be downscaled.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq > after_seq or self.failed, timeout)
+            if self.seq <= after_seq:
+                return None
+            frame, timestamp, seq = self.frame, self.timestamp, self.seq
+        
+        if self.width:
+            height, width = frame.shape[:2]
+            size = (self.width, self.height or height * self.width // width)
+            if size != (width, height):
+                return cv2.resize(frame, size, interpolation=cv2.INTER_AREA), frame, timestamp, seq
+        return frame, None, timestamp, seq
+
+    def stats(self):
+        return {
+            "frames": self.seq,
+            "last_frame_age_ms": round((time.time() - self.timestamp) * 1000, 1) if self.seq else None,
+        }
+
+class Track:
+    """One elephant followed across frames"""
+
+    def __init__(self, track_id, box, confidence, now):
+        self.id = track_id
+        self.box = box
+        self.confidence = confidence
+        self.peak_confidence = confidence
+        self.hits = 1
+        self.first_seen = now
+        self.last_seen = now
+        self.confirmed = False
+
+class ElephantTracker:
+    """SORT-style tracker for one camera, minus the Kalman filter.
+
+    Detections are matched greedily to existing tracks by IoU, with a
+    centroid-distance fallback for low sample rates where boxes stop
+    overlapping. update() returns (event, track) pairs: "enter" once a track
+    has min_hits detections, "update" for each later match, and "exit" once
+    it has gone unmatched for max_age seconds.
+    """
+
+    def __init__(self, iou_threshold, min_hits, max_age):
+        self.iou_threshold = iou_threshold
+        self.min_hits = min_hits
+        self.max_age = max_age
+        self.tracks = {}
+        self.next_id = 1
+
+    def update(self, detections, now):
+        """detections: list of (xyxy, confidence) from one inference"""
+        events = []
+        unmatched = set(range(len(detections)))
+        free_tracks = set(self.tracks)
+        
+        # Match by IoU first, then by centroid distance for boxes that no longer overlap
+        for score, minimum in ((box_iou, self.iou_threshold), (centroid_closeness, 0)):
+            candidates = sorted(
+                ((score(self.tracks[track_id].box, detections[i][0]), track_id, i)
+                 for track_id in free_tracks for i in unmatched),
+                reverse=True
+            )
+            for value, track_id, i in candidates:
+                if value < minimum:
+                    break
+                if track_id not in free_tracks or i not in unmatched:
+                    continue
+                free_tracks.discard(track_id)
+                unmatched.discard(i)
+                events.extend(self._hit(self.tracks[track_id], detections[i], now))
+        
+        for i in sorted(unmatched):
+            box, confidence = detections[i]
+            track = Track(self.next_id, box, confidence, now)
+            self.next_id += 1
+            self.tracks[track.id] = track
+            events.extend(self._hit(track, None, now))
+        
+        events.extend(self.expire(now))
+        return events
+
+    def _hit(self, track, detection, now):
+        if detection is not None:
+            track.box, track.confidence = detection
+            track.peak_confidence = max(track.peak_confidence, track.confidence)
+            track.hits += 1
+            track.last_seen = now
+        
+        if track.confirmed:
+            return [("update", track)]
+        if track.hits >= self.min_hits:
+            track.confirmed = True
+            return [("enter", track)]
+        return []
+
+    def expire(self, now):
+        """Drop tracks that have not been matched for max_age seconds"""
+        events = []
+        for track_id, track in list(self.tracks.items()):
+            if now - track.last_seen > self.max_age:
+                del self.tracks[track_id]
+                if track.confirmed:
+                    events.append(("exit", track))
+        return events
+
+class ExpiringKeyStore:
+    """Thread-safe set of keys that expire ttl seconds after they were last added.
+
+    Keys are kept in an OrderedDict in insertion-time order, so expiry only
+    pops from the front and lookups are a single dict hit. max_entries bounds
+    memory by evicting the oldest keys first.
+    """
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _expire(self, now):
+        while self.entries:
+            key, added = next(iter(self.entries.items()))
+            if now - added <= self.ttl:
+                break
+            self.entries.popitem(last=False)
+
+    def add(self, key):
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            self.entries[key] = now
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def check_and_add(self, key):
+        """Add key and return True if it was already present (a duplicate)"""
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            duplicate = key in self.entries
+            self.entries[key] = now
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return duplicate
+
+    def __len__(self):
+        with self.lock:
+            self._expire(time.time())
+            return len(self.entries)
+
+recent_detections = ExpiringKeyStore(detection_cooldown, dedup_max_entries)
+
+class DetectionHistory:
+    """Fixed-size ring of recent detections stored column by column.
+
+    Numbers live in preallocated typed arrays and strings in fixed-length
+    lists, so memory stays flat however long the node runs. Records get
+    increasing ids; once the ring is full the oldest slot is overwritten.
+    Ids restart at 1 on every boot, so the ids handed to stream clients carry
+    a per-boot prefix. Only used from the event loop, so it needs no lock.
+    """
+
+    __slots__ = (
+        "capacity", "boot_id", "next_id", "ids", "timestamps", "confidences", "track_ids",
+        "camera_ids", "locations", "image_paths", "clip_paths", "event_ids",
+    )
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.boot_id = os.urandom(4).hex()
+        self.next_id = 1
+        self.ids = array("q", [0]) * capacity
+        self.timestamps = array("d", [0.0]) * capacity
+        self.confidences = array("f", [0.0]) * capacity
+        self.track_ids = array("q", [0]) * capacity
+        self.camera_ids = [None] * capacity
+        self.locations = [None] * capacity
+        self.image_paths = [None] * capacity
+        self.clip_paths = [None] * capacity
+        self.event_ids = [None] * capacity
+
+    def add(self, data, timestamp, image_path):
+        """Store a detection record, returns its id"""
+        record_id = self.next_id
+        slot = (record_id - 1) % self.capacity
+        self.ids[slot] = record_id
+        self.timestamps[slot] = timestamp
+        self.confidences[slot] = data["confidence"]
+        self.track_ids[slot] = data["track_id"]
+        self.camera_ids[slot] = sys.intern(data["camera_id"])
+        self.locations[slot] = sys.intern(data["location"])
+        self.image_paths[slot] = image_path
+        self.clip_paths[slot] = data.get("clip_path")
+        self.event_ids[slot] = data["event_id"]
+        self.next_id += 1
+        return record_id
+
+    @property
+    def total(self):
+        return self.next_id - 1
+
+    def get(self, record_id):
+        """A record by id, or None once it has been overwritten"""
+        slot = (record_id - 1) % self.capacity
+        return self.record(slot) if self.ids[slot] == record_id else None
+
+    def after(self, record_id):
+        """Records newer than record_id still in the ring, oldest first"""
+        first = max(record_id + 1, self.total - len(self) + 1)
+        return [self.record((i - 1) % self.capacity) for i in range(first, self.total + 1)]
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def stream_id(self, record_id):
+        return f"{self.boot_id}-{record_id}"
+
+    def resume_point(self, stream_id):
+        """Record id a client's Last-Event-ID refers to, 0 when it is from an earlier boot or unknown"""
+        boot_id, _, record_id = stream_id.rpartition("-")
+        if boot_id != self.boot_id or not record_id.isdigit() or int(record_id) > self.total:
+            return 0
+        return int(record_id)
+
+    def record(self, slot):
+        return {
+            "id": self.ids[slot],
+            "event_id": self.event_ids[slot],
+            "camera_id": self.camera_ids[slot],
+            "location": self.locations[slot],
+            "confidence": round(self.confidences[slot], 4),
+            "track_id": self.track_ids[slot],
+            "timestamp": datetime.fromtimestamp(self.timestamps[slot]).isoformat(),
+            "image_path": self.image_paths[slot],
+            "clip_path": self.clip_paths[slot],
+        }
+
+    def query(self, camera_id=None, since=None, limit=50):
+        """Newest records first, optionally for one camera and newer than a timestamp"""
+        records = []
+        for record_id in range(self.total, self.total - len(self), -1):
+            slot = (record_id - 1) % self.capacity
+            if since is not None and self.timestamps[slot] <= since:
+                continue
+            if camera_id is not None and self.camera_ids[slot] != camera_id:
+                continue
+            records.append(self.record(slot))
+            if len(records) >= limit:
+                break
+        return records
+
+detection_history = DetectionHistory(detection_history_size)
+
+class DetectionEventStream:
+    """Push new detection records to server-sent event clients.
+
+    Every client gets a bounded queue. A client that falls behind loses its
+    oldest queued events instead of growing memory or slowing the pipeline,
+    and a reconnecting client catches up from the detection history using
+    the Last-Event-ID it last received. An id from before a restart replays
+    everything recorded since the restart.
+    """
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self.clients = set()
+        self.dropped = 0
+
+    @property
+    def client_count(self):
+        return len(self.clients)
+
+    def publish(self, record):
+        """Queue a record for every client, runs on the event loop"""
+        for client in list(self.clients):
+            if client.full():
+                client.get_nowait()
+                self.dropped += 1
+            client.put_nowait(record)
+
+    async def events(self, last_event_id=None):
+        """Yield SSE messages, replaying missed records first when resuming"""
+        client = asyncio.Queue(maxsize=self.queue_size)
+        # Subscribe before replaying so nothing published in between is missed
+        self.clients.add(client)
+        try:
+            yield "retry: 3000\n\n"
+            last_sent = 0
+            if last_event_id is not None:
+                last_sent = detection_history.resume_point(last_event_id)
+                for record in detection_history.after(last_sent):
+                    yield self.message(record)
+                    last_sent = record["id"]
+            
+            while True:
+                try:
+                    record = await asyncio.wait_for(client.get(), detection_stream_keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if record is None:
+                    break
+                if record["id"] <= last_sent:
+                    continue
+                yield self.message(record)
+                last_sent = record["id"]
+        finally:
+            self.clients.discard(client)
+
+    @staticmethod
+    def message(record):
+        return f"id: {detection_history.stream_id(record['id'])}\nevent: detection\ndata: {json.dumps(record)}\n\n"
+
+    def close(self):
+        """End every open stream"""
+        self.publish(None)
+
+detection_stream = DetectionEventStream(detection_stream_queue_size)
+
+def detection_key(camera_id, frame, box):
+    """Key an elephant by camera and the grid area its box centre falls in"""
+    height, width = frame.shape[:2]
+    cx = (box[0] + box[2]) / 2
+    cy = (box[1] + box[3]) / 2
+    col = min(dedup_grid - 1, max(0, int(cx / width * dedup_grid)))
+    row = min(dedup_grid - 1, max(0, int(cy / height * dedup_grid)))
+    return (camera_id, col, row)
+
+class AdaptiveSampler:
+    """Pick when a camera loop sends its freshest frame to the detector.
+
+    Targets idle_fps normally and active_fps while an elephant is being
+    tracked. The interval doubles while the inference queue is saturated and
+    halves again once it drains.
+    """
+
+    def __init__(self, idle_fps, active_fps, max_backoff):
+        self.idle_fps = idle_fps
+        self.active_fps = active_fps
+        self.max_backoff = max_backoff
+        self.backoff = 1
+        self.fps = idle_fps
+        self.next_due = 0
+
+    def due(self, now):
+        return now >= self.next_due
+
+    def mark(self, now, tracking, saturated):
+        """Schedule the next sample after one was taken at `now`"""
+        if saturated:
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+        else:
+            self.backoff = max(1, self.backoff // 2)
+        
+        self.fps = (self.active_fps if tracking else self.idle_fps) / self.backoff
+        self.next_due = now + 1 / self.fps
+
+    def stats(self):
+        return {"target_fps": round(self.fps, 2), "backoff": self.backoff}
+
+inference_scheduler = InferenceScheduler(inference_max_batch_size, inference_max_wait)
+
+def predict_batch(frames):
+    """Run the loaded model on a batch of frames"""
+    return model.predict(frames, conf=0.5, verbose=False)
+
+def get_broadcaster(camera_id):
+    """Return the broadcaster for a camera, creating it on first use"""
+    return broadcasters.setdefault(camera_id, FrameBroadcaster(camera_id))
 
 def should_upload_detection(camera_id):
     """Check if enough time has passed since last upload for this camera"""
@@ -191,142 +1234,917 @@ def should_upload_detection(camera_id):
     time_since_last_upload = current_time - last_upload_time[camera_id]
     return time_since_last_upload >= upload_interval
 
-async def start_camera_monitoring():
-    """Start monitoring camera"""
-    cameras_config = [
-        {"id": "camera_1", "source": 0, "location": "Main Entrance"},
-    ]
+def load_camera_registry():
+    """Read camera configs from the registry file, falling back to the defaults"""
+    if not os.path.exists(cameras_config_path):
+        return [CameraConfig(**camera).model_dump() for camera in default_cameras]
+    
+    with open(cameras_config_path) as f:
+        return [CameraConfig(**camera).model_dump() for camera in json.load(f)]
+
+def save_camera_registry():
+    """Persist the running camera configs so they survive a restart"""
+    with camera_registry_lock:
+        cameras = [worker["config"] for worker in camera_workers.values()]
     
-    for camera_config in cameras_config:
-        threading.Thread(
+    tmp_path = f"{cameras_config_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cameras, f, indent=2)
+    os.replace(tmp_path, cameras_config_path)
+
+def start_camera(camera_config):
+    """Start a capture worker for a camera, returns False if it is already running"""
+    camera_id = camera_config["id"]
+    with camera_registry_lock:
+        if camera_id in camera_workers:
+            return False
+        # A removed camera's old thread must let go of the device first
+        stopping = stopping_workers.pop(camera_id, None)
+        if stopping and stopping["thread"].is_alive():
+            stopping_workers[camera_id] = stopping
+            return False
+        
+        stop_event = threading.Event()
+        thread = threading.Thread(
             target=monitor_camera,
-            args=(camera_config["id"], camera_config["source"], camera_config["location"]),
+            args=(camera_config, stop_event),
             daemon=True
-        ).start()
-        print(f"Started monitoring {camera_config['id']}")
+        )
+        camera_workers[camera_id] = {"config": camera_config, "stop_event": stop_event, "thread": thread}
+    
+    thread.start()
+    print(f"Started monitoring {camera_id}")
+    return True
 
-def process_detection_async(frame, results, camera_id, camera_location, confidence):
-    """Process detection in a separate thread"""
-    def process():
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            detection_data = loop.run_until_complete(
-                save_detection(frame, results, camera_id, camera_location, confidence)
-            )
-            detection_results.append(detection_data)
-            
-            # Only upload if enough time has passed
-            if should_upload_detection(camera_id):
-                # Run notifications and upload concurrently for better performance
-                loop.run_until_complete(asyncio.gather(
-                    push_notification(detection_data),
-                    upload_to_convex(detection_data)
-                ))
-
-                last_upload_time[camera_id] = time.time()
-                print(f"NEW ELEPHANT DETECTED & UPLOADED! Camera: {camera_id}, Confidence: {confidence:.2f}")
-            else:
-                time_remaining = upload_interval - (time.time() - last_upload_time[camera_id])
-                print(f"Elephant detected but not uploaded (cooldown: {time_remaining:.1f}s remaining). Camera: {camera_id}, Confidence: {confidence:.2f}")
-            
-        except Exception as e:
-            print(f"Error processing detection: {e}")
-        finally:
-            loop.close()
+def stop_camera(camera_id):
+    """Signal a camera's capture worker to stop, returns False if it is unknown"""
+    with camera_registry_lock:
+        worker = camera_workers.pop(camera_id, None)
+        if worker is not None:
+            stopping_workers[camera_id] = worker
+    if worker is None:
+        return False
+    
+    worker["stop_event"].set()
+    motion_gates.pop(camera_id, None)
+    samplers.pop(camera_id, None)
+    trackers.pop(camera_id, None)
+    clip_buffers.pop(camera_id, None)
+    camera_stats.pop(camera_id, None)
+    broadcaster = broadcasters.pop(camera_id, None)
+    if broadcaster:
+        broadcaster.close()
+    print(f"Stopped monitoring {camera_id}")
+    return True
+
+def join_camera(camera_id, timeout=camera_stop_timeout):
+    """Wait for a stopped camera's capture thread to exit, returns False if it is still running"""
+    with camera_registry_lock:
+        worker = stopping_workers.get(camera_id)
+    if worker is None:
+        return True
+    
+    worker["thread"].join(timeout)
+    if worker["thread"].is_alive():
+        return False
+    with camera_registry_lock:
+        if stopping_workers.get(camera_id) is worker:
+            del stopping_workers[camera_id]
+    return True
+
+async def start_camera_monitoring():
+    """Start monitoring every camera in the registry"""
+    for camera_config in load_camera_registry():
+        start_camera(camera_config)
+
+def gst_decode_pipeline(source, hw_decode, width=None, height=None):
+    """GStreamer elements from the source up to raw video in system memory.
+
+    RTSP streams are depayloaded and parsed (rtspsrc outputs RTP, which no
+    decoder accepts directly), other URIs go through parsebin. Without
+    hardware decoding decodebin picks a decoder; with it the CAPTURE_GST_HW
+    preset is used, or CAPTURE_GST_DECODE replaces everything after the source.
+    With a width the frames are scaled right after decoding, on the GPU for
+    the hardware presets; square pixels keep the aspect when there is no height.
+    """
+    size = ""
+    if width:
+        size = f",width={width}" + (f",height={height}" if height else "") + ",pixel-aspect-ratio=1/1"
+    
+    rtsp = source.startswith("rtsp")
+    source_element = f"rtspsrc location={source} latency=0" if rtsp else f"urisourcebin uri={source}"
+    if hw_decode and capture_gst_decode:
+        scale = f" ! videoscale ! video/x-raw{size}" if size else ""
+        return f"{source_element} ! {capture_gst_decode}{scale}"
     
-    # This already runs in background as a daemon thread
-    threading.Thread(target=process, daemon=True).start()
+    parse = f"rtp{capture_gst_codec}depay ! {capture_gst_codec}parse" if rtsp else "parsebin"
+    decoder, scaler, caps = gst_hw_decoders[capture_gst_hw] if hw_decode else ("decodebin", "videoscale", "video/x-raw")
+    return f"{source_element} ! {parse} ! {decoder} ! {scaler} ! {caps}{size}"
 
-def monitor_camera(camera_id, camera_source, camera_location):
+def open_capture(camera_config):
+    """Open a camera with its configured backend.
+
+    GStreamer scales inside the decode pipeline, so frames are never
+    decoded into system memory at full size (snapshots then use the reduced
+    size too). OpenCV and FFmpeg decode at the source resolution (device
+    cameras are asked for the target size) and the frames the camera loop
+    takes are downscaled, keeping the full resolution frame for snapshots.
+    A directory source replays its images in name order. Returns
+    (cap, resize_width, resize_height), the size left to resize to on the CPU.
+    """
+    source = camera_config["source"]
+    backend = camera_config.get("backend") or capture_backend
+    width = camera_config.get("width") or capture_width
+    height = camera_config.get("height") or capture_height
+    # A directory of images replays like a recorded video
+    if isinstance(source, str) and os.path.isdir(source):
+        return ImageDirectoryCapture(source), width, height
+    
+    hw_decode = camera_config.get("hw_decode")
+    hw_decode = capture_hw_decode if hw_decode is None else hw_decode
+    
+    if backend == "gstreamer" and isinstance(source, str):
+        pipeline = f"{gst_decode_pipeline(source, hw_decode, width, height)} ! videoconvert ! video/x-raw,format=BGR ! appsink drop=true max-buffers=1 sync=false"
+        print(f"GStreamer pipeline for {camera_config['id']}: {pipeline}")
+        return cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER), None, None
+    
+    params = []
+    if hw_decode:
+        params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+    if backend == "ffmpeg":
+        cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, params)
+    else:
+        cap = cv2.VideoCapture(source, cv2.CAP_ANY, params)
+    
+    if isinstance(source, int) and cap.isOpened():
+        if width:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    return cap, width, height
+
+def monitor_camera(camera_config, stop_event):
     """Monitor camera for elephant detection"""
     global active_cameras
+    camera_id = camera_config["id"]
     
-    cap = cv2.VideoCapture(camera_source)
+    counters = camera_stats.setdefault(camera_id, CameraStats(camera_stats_window))
+    cap, width, height = open_capture(camera_config)
     if not cap.isOpened():
         print(f"Failed to open camera {camera_id}")
+        counters.read_failed()
         return
     
     active_cameras[camera_id] = cap
-    frame_count = 0
+    capture = captures[camera_id] = LatestFrameCapture(cap, camera_id, width, height, counters)
+    capture.start()
+    try:
+        watch_camera(capture, camera_id, camera_config["location"], stop_event, counters)
+    finally:
+        capture.stop()
+        if active_cameras.get(camera_id) is cap:
+            del active_cameras[camera_id]
+        if captures.get(camera_id) is capture:
+            del captures[camera_id]
+        cap.release()
+        # End open live streams instead of leaving viewers on a frozen frame
+        broadcaster = broadcasters.get(camera_id)
+        if broadcaster:
+            broadcaster.close()
+
+def watch_camera(capture, camera_id, camera_location, stop_event, counters):
+    """Read frames and run detection until the camera fails or is stopped"""
+    broadcaster = get_broadcaster(camera_id)
+    motion_gate = motion_gates[camera_id] = MotionGate(motion_threshold, motion_force_interval)
+    sampler = samplers[camera_id] = AdaptiveSampler(sample_idle_fps, sample_active_fps, sample_max_backoff)
+    tracker = trackers[camera_id] = ElephantTracker(track_iou_threshold, track_min_hits, track_max_age)
+    clip_buffer = clip_buffers[camera_id] = ClipBuffer(clip_buffer_bytes) if clip_fps > 0 else None
+    results = None
+    inference_timings = {}
+    last_stream_time = 0
+    last_clip_time = 0
+    last_elephant_time = 0
+    last_seq = 0
+    due_seq = 0
+    slept = False
     
-    while True:
-        success, frame = cap.read()
-        if not success:
-            print(f"Failed to read from camera {camera_id}")
-            break
+    while not stop_event.is_set():
+        # Sleep until the detector or a live viewer needs a frame, then take the newest one
+        now = time.time()
+        wake_at = sampler.next_due
+        if broadcaster.viewer_count > 0:
+            wake_at = min(wake_at, last_stream_time + stream_interval)
+        if clip_buffer:
+            wake_at = min(wake_at, last_clip_time + 1 / clip_fps)
+        if wake_at > now:
+            stop_event.wait(min(wake_at - now, 0.1))
+            slept = True
+            continue
+        if slept:
+            # Frames replaced while the loop slept were skipped on purpose
+            due_seq = capture.seq
+            slept = False
         
-        frame_count += 1
+        latest = capture.latest(last_seq)
+        if latest is None:
+            if capture.failed:
+                print(f"Failed to read from camera {camera_id}")
+                break
+            continue
+        frame, full_frame, captured_at, seq = latest
+        # Frames replaced in the capture slot after the loop was due, because it was still busy
+        dropped = seq - max(last_seq, due_seq) - 1
+        if last_seq and dropped > 0:
+            counters.frames_dropped(dropped)
+        last_seq = seq
+        
+        now = time.time()
+        # Only encoded frames go into the clip ring, raw frames are never kept
+        if clip_buffer and now - last_clip_time >= 1 / clip_fps:
+            last_clip_time = now
+            encoded, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, clip_jpeg_quality])
+            if encoded:
+                clip_buffer.add(captured_at, buffer.tobytes())
         
-        if frame_count % 5 == 0:
+        infer_due = sampler.due(now)
+        stream_due = broadcaster.viewer_count > 0 and now - last_stream_time >= stream_interval
+        tracking = now - last_elephant_time < tracking_hold
+        events = []
+        if infer_due:
+            sampler.mark(now, tracking, inference_scheduler.saturated())
+        if infer_due and motion_gate.should_infer(frame, now, tracking):
             try:
-                results = model.predict(frame, conf=0.5, verbose=False)
+                # Frame age when the loop picked it up counts as capture latency
+                inference_timings = {}
+                record_stage(inference_timings, "capture", now - captured_at)
+                results = inference_scheduler.predict(camera_id, frame, inference_timings)
+                counters.inferred(time.time(), inference_timings["inference"])
                 
+                elephants = []
                 for r in results:
-                    if r.boxes is not None and len(r.boxes) > 0:
-                        elephant_boxes = []
-                        
+                    if r.boxes is not None:
                         for box in r.boxes:
                             cls_id = int(box.cls[0])
                             confidence = float(box.conf[0])
-                            class_name = model.names[cls_id]
+                            class_name = class_names[cls_id]
                             
                             if class_name.lower() == 'elephant' and confidence > 0.7:
-                                elephant_boxes.append(box)
-                        
-                        if elephant_boxes:
-                            detection_hash = create_detection_hash(frame, elephant_boxes)
-                            
-                            if not is_duplicate_detection(detection_hash):
-                                recent_detections.add((detection_hash, time.time()))
-                                
-                                # Process detection asynchronously
-                                process_detection_async(
-                                    frame.copy(), results, camera_id, camera_location, confidence
-                                )
-                            
+                                elephants.append(([float(v) for v in box.xyxy[0]], confidence))
+                
+                if elephants:
+                    last_elephant_time = now
+                events = tracker.update(elephants, now)
+                
             except Exception as e:
                 print(f"Error processing frame: {e}")
+        elif infer_due:
+            events = tracker.expire(now)
         
-        time.sleep(0.1)
-
-async def save_detection(frame, results, camera_id, camera_location, confidence=0.7):
-    """Save detection snapshot"""
-    timestamp = datetime.now()
-    unique_id = int(timestamp.timestamp() * 1e6)
-    
-    # Run annotation in executor to avoid blocking
-    loop = asyncio.get_event_loop()
-    annotated_frame = await loop.run_in_executor(
-        executor, 
-        lambda: results[0].plot()
-    )
+        for event, track in events:
+            key = detection_key(camera_id, frame, track.box)
+            if event == "enter":
+                if recent_detections.check_and_add(key):
+                    print(f"Elephant track {track.id} on camera {camera_id} re-acquired within cooldown, not alerting again")
+                    continue
+                clip_name = None
+                if clip_buffer:
+                    clip_name = f"{re.sub(r'[^A-Za-z0-9_-]', '_', camera_id)}_{track.id}_{int(captured_at)}.mp4"
+                    main_loop.call_soon_threadsafe(start_clip_recording, clip_buffer, captured_at, clip_name)
+                # Hand the detection to the event pipeline, once per elephant
+                detection_pipeline.submit({
+                    "frame": frame,
+                    "results": results,
+                    "camera_id": camera_id,
+                    "location": camera_location,
+                    "confidence": track.confidence,
+                    "track_id": track.id,
+                    "timestamp": datetime.fromtimestamp(captured_at),
+                    "clip_name": clip_name,
+                    "full_frame": full_frame,
+                    "captured_at": captured_at,
+                    "timings": dict(inference_timings),
+                })
+            elif event == "update":
+                recent_detections.add(key)
+            elif event == "exit":
+                print(f"Elephant track {track.id} left camera {camera_id} after {track.last_seen - track.first_seen:.0f}s (peak confidence {track.peak_confidence:.2f})")
+        
+        # Live viewers reuse the latest detection results instead of running their own inference
+        if stream_due:
+            last_stream_time = now
+            try:
+                annotated_frame = process_frame_annotation(frame, results or [], camera_id)
+                encoded, buffer = cv2.imencode('.jpg', annotated_frame)
+                if encoded:
+                    broadcaster.publish(buffer.tobytes())
+            except Exception as e:
+                print(f"Live stream error: {e}")
+
+def start_clip_recording(clip_buffer, event_time, clip_name):
+    """Schedule a clip around event_time, runs on the event loop"""
+    task = asyncio.create_task(record_clip(clip_buffer, event_time, clip_name))
+    clip_tasks.add(task)
+    task.add_done_callback(clip_tasks.discard)
+
+async def record_clip(clip_buffer, event_time, clip_name):
+    """Wait for the post-event frames, then encode the clip off the camera thread"""
+    await asyncio.sleep(clip_seconds_after)
+    frames = clip_buffer.between(event_time - clip_seconds_before, event_time + clip_seconds_after)
+    if not frames:
+        return
     
-    snapshot_filename = f"elephant_{camera_id}_{unique_id}.jpg"
-    snapshot_path = os.path.join(snapshot_dir, snapshot_filename)
+    clip_path = os.path.join(clip_dir, clip_name)
+    try:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(clip_executor, write_clip, frames, clip_path)
+        print(f"Saved clip {clip_path} ({len(frames)} frames)")
+    except Exception as e:
+        print(f"Failed to write clip {clip_path}: {e}")
+
+def write_clip(frames, clip_path):
+    """Decode buffered JPEG frames and write them out as an MP4 clip"""
+    duration = frames[-1][0] - frames[0][0]
+    fps = (len(frames) - 1) / duration if duration > 0 else clip_fps
     
-    # Save image in executor
-    await loop.run_in_executor(
-        executor,
-        lambda: cv2.imwrite(snapshot_path, annotated_frame)
-    )
+    first = cv2.imdecode(np.frombuffer(frames[0][1], np.uint8), cv2.IMREAD_COLOR)
+    height, width = first.shape[:2]
+    tmp_path = f"{clip_path[:-4]}.tmp.mp4"
+    writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    try:
+        for _, jpeg_bytes in frames:
+            frame = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_COLOR)
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            writer.write(frame)
+    finally:
+        writer.release()
+    os.replace(tmp_path, clip_path)
+
+class DetectionPipeline:
+    """Long-lived asyncio pipeline taking detection events from camera threads to delivery.
+
+    Camera threads hand events over with submit(). The ingress buffer is
+    bounded and applies the overflow policy when full, so a burst never blocks
+    a camera loop: drop_newest ignores the new event, drop_oldest evicts the
+    oldest queued one and merge replaces a queued event from the same camera.
+    Stages are linked by bounded queues, so a slow upload stage stalls
+    encoding instead of piling frames up in memory.
+    """
+
+    def __init__(self, stages, queue_size, policy):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.policy = policy
+        self.ingress = deque()
+        self.ingress_ready = None
+        self.queues = []
+        self.tasks = []
+        self.submitted = 0
+        self.dropped = 0
+        self.merged = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        self.ingress_ready = asyncio.Event()
+        self.queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages[1:]]
+        for index, (name, handler) in enumerate(self.stages):
+            for _ in range(pipeline_workers[name]):
+                self.tasks.append(asyncio.create_task(self._worker(index, name, handler)))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, event):
+        """Hand an event over from a camera thread"""
+        main_loop.call_soon_threadsafe(self._enqueue, event)
+
+    def _enqueue(self, event):
+        self.submitted += 1
+        if len(self.ingress) >= self.queue_size:
+            if self.policy == "drop_newest":
+                self.dropped += 1
+                print(f"Detection pipeline full, dropped event from {event['camera_id']}")
+                return
+            if self.policy == "merge":
+                for i, queued in enumerate(self.ingress):
+                    if queued["camera_id"] == event["camera_id"]:
+                        self.ingress[i] = event
+                        self.merged += 1
+                        return
+            self.ingress.popleft()
+            self.dropped += 1
+            print("Detection pipeline full, dropped oldest event")
+        
+        event["queued_at"] = time.monotonic()
+        self.ingress.append(event)
+        self.ingress_ready.set()
+
+    async def _next_event(self):
+        while not self.ingress:
+            self.ingress_ready.clear()
+            await self.ingress_ready.wait()
+        return self.ingress.popleft()
+
+    async def _worker(self, index, name, handler):
+        source = self.queues[index - 1] if index > 0 else None
+        sink = self.queues[index] if index < len(self.queues) else None
+        
+        while True:
+            event = await (source.get() if source else self._next_event())
+            record_stage(event["timings"], f"{name}_queue", time.monotonic() - event["queued_at"])
+            try:
+                with timed(event["timings"], name):
+                    await handler(event)
+            except Exception as e:
+                self.failed += 1
+                print(f"Error processing detection ({name}): {e}")
+                continue
+            
+            if sink:
+                event["queued_at"] = time.monotonic()
+                await sink.put(event)
+            else:
+                self.completed += 1
+                event_seconds.observe("completed", time.time() - event["captured_at"])
+                timings = {stage: round(seconds * 1000, 1) for stage, seconds in event["timings"].items()}
+                print(f"Detection {event['data']['event_id']} stage timings (ms): {json.dumps(timings)}")
+
+    def metrics(self):
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "queue_depth": {
+                name: len(self.ingress) if index == 0 else self.queues[index - 1].qsize()
+                for index, (name, _) in enumerate(self.stages)
+            },
+        }
+
+def rescale_result(result, frame):
+    """Move a result's boxes onto a full resolution version of its frame"""
+    height, width = result.orig_shape
+    full_height, full_width = frame.shape[:2]
+    data = result.boxes.data
+    data = data.clone() if hasattr(data, "clone") else data.copy()
+    data[:, [0, 2]] *= full_width / width
+    data[:, [1, 3]] *= full_height / height
+    return Results(orig_img=frame, path=result.path, names=result.names, boxes=data)
+
+async def annotate_detection(event):
+    """Pipeline stage: draw the detections on the frame"""
+    loop = asyncio.get_running_loop()
+    result = event.pop("results")[0]
+    event.pop("frame")
+    
+    # Scaled-down cameras hand over the full resolution version of the inferred frame
+    full_frame = event.pop("full_frame")
+    if full_frame is not None:
+        result = rescale_result(result, full_frame)
+    
+    event["annotated_frame"] = await loop.run_in_executor(executor, result.plot)
+
+def store_snapshot(frame, timings=None):
+    """Encode a snapshot in memory and write it under its content hash, returns the path"""
+    success, buffer = cv2.imencode('.jpg', frame)
+    if not success:
+        raise ValueError("Failed to encode snapshot")
+    
+    jpeg_bytes = buffer.tobytes()
+    snapshot_path = os.path.join(snapshot_dir, f"{hashlib.sha256(jpeg_bytes).hexdigest()}.jpg")
+    if not os.path.exists(snapshot_path):
+        with timed(timings, "disk"):
+            tmp_path = f"{snapshot_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(jpeg_bytes)
+            os.replace(tmp_path, snapshot_path)
+            if snapshot_thumbnails:
+                write_thumbnail_frame(frame, os.path.join(thumbnail_dir, os.path.basename(snapshot_path)))
+    return snapshot_path
+
+def snapshot_url(snapshot_path):
+    """URL the dashboard and notifications use for a locally served snapshot"""
+    return f"{public_base_url}/snapshots/{os.path.basename(snapshot_path)}"
+
+async def encode_detection(event):
+    """Pipeline stage: encode and save the snapshot"""
+    annotated_frame = event.pop("annotated_frame")
+    loop = asyncio.get_running_loop()
+    event["snapshot_path"] = await loop.run_in_executor(executor, store_snapshot, annotated_frame, event["timings"])
+
+class Outbox:
+    """SQLite (WAL) outbox holding detection records until they are delivered.
+
+    A record is written before any network call and only deleted once Convex
+    accepted it, so uploads survive outages and restarts. The idempotency key
+    is fixed when the record is created and sent on every attempt. Records
+    that keep failing are parked (dead = 1) and no longer retried. Each record
+    carries its detection's stage timings, extended by every upload attempt.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = None
+        self.lock = threading.Lock()
+
+    def open(self):
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT UNIQUE NOT NULL,
+                payload TEXT NOT NULL,
+                snapshot_path TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                created REAL NOT NULL,
+                last_error TEXT,
+                dead INTEGER NOT NULL DEFAULT 0,
+                timings TEXT
+            )
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")}
+        if "dead" not in columns:
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN dead INTEGER NOT NULL DEFAULT 0")
+        if "timings" not in columns:
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN timings TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_next_attempt ON outbox (next_attempt)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def add(self, key, data, snapshot_path, timings=None):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO outbox (key, payload, snapshot_path, next_attempt, created, timings) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(data), snapshot_path, now, now, json.dumps(timings or {}))
+            )
+
+    def due(self, now, limit):
+        """Oldest records whose next attempt is due: (id, key, payload, snapshot_path, attempts, next_attempt, timings)"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT id, key, payload, snapshot_path, attempts, next_attempt, timings FROM outbox "
+                "WHERE dead = 0 AND next_attempt <= ? ORDER BY id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+
+    def next_due(self):
+        with self.lock:
+            return self.conn.execute("SELECT MIN(next_attempt) FROM outbox WHERE dead = 0").fetchone()[0]
+
+    def update_payload(self, row_id, data, timings):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET payload = ?, timings = ? WHERE id = ?", (json.dumps(data), json.dumps(timings), row_id)
+            )
+
+    def delivered(self, row_ids):
+        with self.lock:
+            self.conn.executemany("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id in row_ids])
+
+    def retry(self, row_id, attempts, next_attempt, error, timings):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ?, timings = ? WHERE id = ?",
+                (attempts, next_attempt, error, json.dumps(timings), row_id)
+            )
+
+    def park(self, row_id, attempts, error, timings):
+        """Stop retrying a record, it stays in the table for inspection"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE outbox SET attempts = ?, last_error = ?, dead = 1, timings = ? WHERE id = ?",
+                (attempts, error, json.dumps(timings), row_id)
+            )
+
+    def snapshot_paths(self):
+        """Snapshots still needed for delivery"""
+        with self.lock:
+            return {row[0] for row in self.conn.execute("SELECT snapshot_path FROM outbox WHERE snapshot_path IS NOT NULL")}
+
+    def stats(self):
+        with self.lock:
+            pending, oldest = self.conn.execute("SELECT COUNT(*), MIN(created) FROM outbox WHERE dead = 0").fetchone()
+            dead = self.conn.execute("SELECT COUNT(*) FROM outbox WHERE dead = 1").fetchone()[0]
+        return {
+            "pending": pending,
+            "dead": dead,
+            "oldest_age_s": round(time.time() - oldest, 1) if oldest else None,
+        }
+
+outbox = Outbox(outbox_path)
+
+class SnapshotRetention:
+    """Keep the snapshots directory within its age and size budget.
+
+    Each pass writes thumbnails store_snapshot did not, packs snapshots older than
+    pack_after into one zip archive per day, then deletes the oldest
+    snapshots, thumbnails and archives beyond max_age or max_bytes.
+    Snapshots still waiting in the outbox are never packed or deleted.
+    """
+
+    def __init__(self, max_bytes, max_age, pack_after, thumbnails):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.pack_after = pack_after
+        self.thumbnails = thumbnails
+        self.lock = threading.Lock()
+        self.archive_index = {}
+        self.stats = {"last_run": None, "packed": 0, "deleted": 0}
+
+    def load_index(self):
+        """Map archived snapshot names to their archive"""
+        with self.lock:
+            for entry in os.scandir(archive_dir):
+                if entry.name.endswith(".zip"):
+                    with zipfile.ZipFile(entry.path) as archive:
+                        for name in archive.namelist():
+                            self.archive_index[name] = entry.path
+
+    def read_archived(self, name):
+        """Content of a packed snapshot, or None if it is not archived"""
+        with self.lock:
+            archive_path = self.archive_index.get(name)
+            if archive_path is None:
+                return None
+            with zipfile.ZipFile(archive_path) as archive:
+                return archive.read(name)
+
+    def run_once(self, protected):
+        now = time.time()
+        snapshots = list_files(snapshot_dir, ".jpg")
+        
+        if self.thumbnails:
+            for path, _, _ in snapshots:
+                thumbnail_path = os.path.join(thumbnail_dir, os.path.basename(path))
+                if not os.path.exists(thumbnail_path):
+                    write_thumbnail(path, thumbnail_path)
+        
+        by_day = {}
+        for path, mtime, _ in snapshots:
+            # Snapshots past max_age are about to be deleted, so there is no point packing them
+            if self.pack_after <= now - mtime <= self.max_age and path not in protected:
+                by_day.setdefault(datetime.fromtimestamp(mtime).strftime("%Y-%m-%d"), []).append(path)
+        for day, paths in by_day.items():
+            self._pack(os.path.join(archive_dir, f"{day}.zip"), paths)
+        
+        # Oldest files go first, whatever kind they are
+        files = sorted(
+            list_files(snapshot_dir, ".jpg") + list_files(thumbnail_dir, ".jpg") + list_archives()
+            + list_files(clip_dir, ".mp4"),
+            key=lambda item: item[1]
+        )
+        total_bytes = sum(size for _, _, size in files)
+        for path, mtime, size in files:
+            if now - mtime <= self.max_age and total_bytes <= self.max_bytes:
+                break
+            if path in protected:
+                continue
+            self._delete(path)
+            total_bytes -= size
+        
+        self.stats.update({
+            "last_run": datetime.fromtimestamp(now).isoformat(),
+            "total_bytes": total_bytes,
+            "snapshots": len(list_files(snapshot_dir, ".jpg")),
+            "archives": len(list_archives()),
+            "archived_snapshots": len(self.archive_index),
+        })
+
+    def _pack(self, archive_path, paths):
+        with self.lock:
+            with zipfile.ZipFile(archive_path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+                for path in paths:
+                    name = os.path.basename(path)
+                    if self.archive_index.get(name) != archive_path:
+                        archive.write(path, name)
+                        self.archive_index[name] = archive_path
+            for path in paths:
+                os.remove(path)
+        self.stats["packed"] += len(paths)
+
+    def _delete(self, path):
+        with self.lock:
+            os.remove(path)
+            if path.endswith(".zip"):
+                for name in [n for n, archive_path in self.archive_index.items() if archive_path == path]:
+                    del self.archive_index[name]
+        self.stats["deleted"] += 1
+
+def list_files(directory, suffix):
+    """(path, mtime, size) of the files in a directory with the given suffix"""
+    files = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(suffix):
+            stat = entry.stat()
+            files.append((entry.path, stat.st_mtime, stat.st_size))
+    return files
+
+def list_archives():
+    """Like list_files, but an archive is as old as the end of the day it holds"""
+    archives = []
+    for path, mtime, size in list_files(archive_dir, ".zip"):
+        try:
+            day = datetime.strptime(os.path.basename(path)[:-4], "%Y-%m-%d")
+            mtime = day.timestamp() + 86400
+        except ValueError:
+            pass
+        archives.append((path, mtime, size))
+    return archives
+
+def write_thumbnail(snapshot_path, thumbnail_path):
+    frame = cv2.imread(snapshot_path)
+    if frame is not None:
+        write_thumbnail_frame(frame, thumbnail_path)
+
+def write_thumbnail_frame(frame, thumbnail_path):
+    height, width = frame.shape[:2]
+    if width > snapshot_thumbnail_width:
+        size = (snapshot_thumbnail_width, height * snapshot_thumbnail_width // width)
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    cv2.imwrite(thumbnail_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
+
+snapshot_retention = SnapshotRetention(
+    snapshot_max_bytes, snapshot_max_age, snapshot_pack_after, snapshot_thumbnails
+)
+
+async def run_snapshot_retention():
+    """Background task applying the snapshot retention policy"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            protected = await loop.run_in_executor(executor, outbox.snapshot_paths)
+            await loop.run_in_executor(retention_executor, snapshot_retention.run_once, protected)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Snapshot retention error: {e}")
+        await asyncio.sleep(snapshot_retention_interval)
+
+async def reschedule_outbox_record(row, error, timings):
+    """Back off exponentially before the record's next attempt"""
+    row_id, key, _, _, attempts, _, _ = row
+    loop = asyncio.get_running_loop()
+    if attempts + 1 >= outbox_max_attempts:
+        await loop.run_in_executor(executor, outbox.park, row_id, attempts + 1, str(error), timings)
+        print(f"Delivery of {key} failed {attempts + 1} times, parked: {error}")
+        return
     
-    img_url = await upload_to_imgbb(snapshot_path)
-    if not img_url:
-        raise HTTPException(status_code=500, detail="Failed to upload image to imgbb")
+    delay = min(outbox_max_backoff, outbox_base_backoff * 2 ** attempts) * random.uniform(0.5, 1)
+    await loop.run_in_executor(executor, outbox.retry, row_id, attempts + 1, time.time() + delay, str(error), timings)
+    print(f"Delivery of {key} failed (attempt {attempts + 1}), retrying in {delay:.0f}s: {error}")
+
+async def prepare_outbox_record(row, timings):
+    """Make sure the record's snapshot is uploaded, returns its data or None if it was rescheduled"""
+    row_id, _, payload, snapshot_path, _, _, _ = row
+    data = json.loads(payload)
+    if data["image_path"]:
+        return data
+    
+    if snapshot_path and os.path.exists(snapshot_path):
+        img_url = await upload_to_imgbb(snapshot_path, timings)
+        if not img_url:
+            await reschedule_outbox_record(row, "Failed to upload image to imgbb", timings)
+            return None
+    else:
+        img_url = "No image path"
+    
+    # Remember the URL so a later retry does not upload the image again
+    data["image_path"] = img_url
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(executor, outbox.update_payload, row_id, data, timings)
+    return data
+
+async def deliver_outbox_batch(rows):
+    """Upload a batch of outbox records, in one bulk insert when the batch route is configured"""
+    # Stage timings of each record's detection, upload attempts are added to them
+    timings = [json.loads(row[6] or "{}") for row in rows]
+    prepared = await asyncio.gather(*(prepare_outbox_record(row, t) for row, t in zip(rows, timings)))
+    ready = [(row, data, t) for row, data, t in zip(rows, prepared, timings) if data is not None]
+    if not ready:
+        return
+    
+    if DATABASE_BATCH_POST_API_ROUTE and await upload_batch_to_convex(
+        [data for _, data, _ in ready], [t for _, _, t in ready]
+    ):
+        results = [True] * len(ready)
+    else:
+        # One bad record must not hold back the rest of its batch, so a failed
+        # bulk insert falls back to posting the records one by one
+        results = await asyncio.gather(*(upload_to_convex(data, row[1], t) for row, data, t in ready))
+    
+    delivered = [row[0] for (row, _, _), accepted in zip(ready, results) if accepted]
+    if delivered:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, outbox.delivered, delivered)
+        now = time.time()
+        for (row, data, t), accepted in zip(ready, results):
+            if accepted:
+                event_seconds.observe("delivered", now - datetime.fromisoformat(data["timestamp"]).timestamp())
+                ms = {stage: round(seconds * 1000, 1) for stage, seconds in t.items()}
+                print(f"Detection {row[1]} delivered, stage timings (ms): {json.dumps(ms)}")
+    for (row, _, t), accepted in zip(ready, results):
+        if not accepted:
+            await reschedule_outbox_record(row, "Failed to upload to Convex", t)
+
+async def drain_outbox():
+    """Background task delivering outbox records in batches with exponential backoff.
+
+    A batch is sent as soon as outbox_batch_size records are due, or once the
+    oldest due record has waited outbox_flush_interval seconds.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            outbox_wakeup.clear()
+            now = time.time()
+            rows = await loop.run_in_executor(executor, outbox.due, now, outbox_batch_size)
+            flush_at = rows[0][5] + outbox_flush_interval if rows else None
+            if rows and (len(rows) >= outbox_batch_size or flush_at <= now):
+                await deliver_outbox_batch(rows)
+                continue
+            
+            if flush_at is not None:
+                timeout = flush_at - now
+            else:
+                next_due = await loop.run_in_executor(executor, outbox.next_due)
+                timeout = outbox_poll_interval if next_due is None else min(max(0, next_due - now), outbox_poll_interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Outbox drainer error: {e}")
+            timeout = outbox_poll_interval
+        
+        try:
+            await asyncio.wait_for(outbox_wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
 
+async def upload_detection(event):
+    """Pipeline stage: persist the detection record in the outbox for delivery"""
+    camera_id = event["camera_id"]
+    confidence = event["confidence"]
+    unique_id = int(event["timestamp"].timestamp() * 1e6)
+    key = f"{camera_id}-{event['track_id']}-{unique_id}"
     data = {
         "type": "elephant_detection",
         "camera_id": camera_id,
-        "location": camera_location,
+        "location": event["location"],
         "message": f"Elephant detected with {confidence:.1%} confidence!",
         "confidence": confidence,
-        "timestamp": timestamp.isoformat(),
-        "image_path": img_url,
+        "timestamp": event["timestamp"].isoformat(),
+        "image_path": snapshot_url(event["snapshot_path"]) if snapshot_storage == "local" else "",
+        "track_id": event["track_id"],
+        "event_id": key,
     }
+    if event["clip_name"] and public_base_url:
+        data["clip_path"] = f"{public_base_url}/clips/{event['clip_name']}"
+    event["data"] = data
+    record_id = detection_history.add(data, event["timestamp"].timestamp(), data["image_path"] or snapshot_url(event["snapshot_path"]))
+    detection_stream.publish(detection_history.get(record_id))
     
-    return data
+    # Only upload if enough time has passed
+    event["announce"] = should_upload_detection(camera_id)
+    if event["announce"]:
+        last_upload_time[camera_id] = time.time()
+        loop = asyncio.get_running_loop()
+        with timed(event["timings"], "outbox"):
+            await loop.run_in_executor(executor, outbox.add, key, data, event["snapshot_path"], event["timings"])
+        outbox_wakeup.set()
+    else:
+        time_remaining = upload_interval - (time.time() - last_upload_time[camera_id])
+        print(f"Elephant detected but not uploaded (cooldown: {time_remaining:.1f}s remaining). Camera: {camera_id}, Confidence: {confidence:.2f}")
+
+async def notify_detection(event):
+    """Pipeline stage: alert rangers about announced detections"""
+    if not event["announce"]:
+        return
+    
+    await push_notification(event["data"], event["timings"])
+    event_seconds.observe("notified", time.time() - event["captured_at"])
+    print(f"NEW ELEPHANT DETECTED & QUEUED FOR UPLOAD! Camera: {event['camera_id']}, Confidence: {event['confidence']:.2f}")
+
+detection_pipeline = DetectionPipeline(
+    [
+        ("annotate", annotate_detection),
+        ("encode", encode_detection),
+        ("upload", upload_detection),
+        ("notify", notify_detection),
+    ],
+    pipeline_queue_size,
+    pipeline_overflow_policy,
+)
 
 @app.get("/")
 async def root():
@@ -334,56 +2152,174 @@ async def root():
         "message": "Elephant Detection System",
         "status": "running",
         "active_cameras": len(active_cameras),
-        "total_detections": len(detection_results),
+        "total_detections": detection_history.total,
+        "detection_stream": {"clients": detection_stream.client_count, "dropped": detection_stream.dropped},
+        "inference": inference_scheduler.metrics(),
+        "pipeline": detection_pipeline.metrics(),
+        "outbox": outbox.stats(),
+        "snapshots": snapshot_retention.stats,
+        "recent_detection_keys": len(recent_detections),
+        "motion_gate": {k: v.stats() for k, v in motion_gates.items()},
+        "sampling": {k: v.stats() for k, v in samplers.items()},
+        "capture": {k: v.stats() for k, v in captures.items()},
         "last_upload_times": {k: datetime.fromtimestamp(v).isoformat() if v > 0 else "Never" for k, v in last_upload_time.items()}
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Detection latency histograms in the Prometheus text format"""
+    body = "\n".join(histogram.render() for histogram in (stage_seconds, event_seconds)) + "\n"
+    return Response(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/detections")
+async def list_detections(camera: Optional[str] = None, since: Optional[datetime] = None, limit: int = 50):
+    """Recent detections from this node, newest first"""
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    return detection_history.query(
+        camera_id=camera,
+        since=since.timestamp() if since else None,
+        limit=min(limit, detection_history_max_limit),
+    )
+
+@app.get("/detections/stream")
+async def stream_detections(request: Request, last_event_id: Optional[str] = None):
+    """Server-sent events for new detections; resumes after Last-Event-ID when reconnecting"""
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+    return StreamingResponse(
+        detection_stream.events(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/main/")
 async def get_main_camera_stream():
     """Get live camera stream with detection"""
-    camera_id = "camera_1"
+    return await get_camera_stream(main_camera_id)
+
+@app.get("/snapshots/{name}")
+async def get_snapshot(name: str, request: Request, thumb: bool = False):
+    """Serve a content-addressed snapshot (or its thumbnail) with ETag and Range support"""
+    if not snapshot_name_pattern.match(name):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
     
-    if camera_id not in active_cameras:
+    # Snapshots without a thumbnail (archived or thumbnails disabled) are served full size
+    fallback = thumb and not os.path.exists(os.path.join(thumbnail_dir, name))
+    thumb = thumb and not fallback
+    # The file name is the SHA-256 of its content, so it never changes
+    etag = f'"{name[:-4]}-thumb"' if thumb else f'"{name[:-4]}"'
+    headers = {
+        "ETag": etag,
+        # A thumbnail URL answered with the full image may get a real thumbnail later
+        "Cache-Control": "no-cache" if fallback else "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    snapshot_path = os.path.join(thumbnail_dir if thumb else snapshot_dir, name)
+    loop = asyncio.get_running_loop()
+    try:
+        content = await loop.run_in_executor(executor, read_file, snapshot_path)
+    except FileNotFoundError:
+        # Older snapshots live in the daily archives
+        content = None if thumb else await loop.run_in_executor(executor, snapshot_retention.read_archived, name)
+        if content is None:
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+    
+    byte_range = parse_range(request.headers.get("range"), len(content))
+    if byte_range is None:
+        return Response(content, media_type="image/jpeg", headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+    return Response(
+        content[start:end + 1],
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="image/jpeg",
+        headers=headers
+    )
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def parse_range(range_header, size):
+    """Parse a single "bytes=start-end" range, returns (start, end) or None for the whole file"""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (range_header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    
+    start, end = match.groups()
+    if start == "":
+        start, end = max(0, size - int(end)), size - 1
+    else:
+        start, end = int(start), (min(int(end), size - 1) if end else size - 1)
+    
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+@app.get("/clips/{name}")
+async def get_clip(name: str):
+    """Serve a recorded pre/post-event clip"""
+    clip_path = os.path.join(clip_dir, os.path.basename(name))
+    if not name.endswith(".mp4") or not os.path.isfile(clip_path):
+        raise HTTPException(status_code=404, detail="Clip not found")
+    return FileResponse(clip_path, media_type="video/mp4")
+
+@app.get("/cameras")
+async def list_cameras():
+    """List registered cameras and whether their capture is open"""
+    with camera_registry_lock:
+        configs = [worker["config"] for worker in camera_workers.values()]
+    return [{**config, "active": config["id"] in active_cameras} for config in configs]
+
+@app.get("/cameras/stats")
+async def get_camera_stats():
+    """Rolling throughput and health figures for every camera"""
+    stats = {}
+    for camera_id, counters in list(camera_stats.items()):
+        broadcaster = broadcasters.get(camera_id)
+        stats[camera_id] = {
+            **counters.stats(),
+            "viewers": broadcaster.viewer_count if broadcaster else 0,
+        }
+    return stats
+
+@app.post("/cameras", status_code=status.HTTP_201_CREATED)
+async def add_camera(camera: CameraConfig):
+    """Register a camera and start monitoring it"""
+    camera_config = camera.model_dump()
+    if not start_camera(camera_config):
+        raise HTTPException(status_code=409, detail="Camera already exists or is still stopping")
+    
+    await asyncio.get_running_loop().run_in_executor(executor, save_camera_registry)
+    return camera_config
+
+@app.delete("/cameras/{camera_id}")
+async def remove_camera(camera_id: str):
+    """Stop monitoring a camera and remove it from the registry"""
+    if not stop_camera(camera_id):
         raise HTTPException(status_code=404, detail="Camera not found")
     
-    async def generate_frames():
-        cap = active_cameras[camera_id]
-        loop = asyncio.get_event_loop()
-        
-        while True:
-            success, frame = cap.read()
-            if not success:
-                break
-            
-            try:
-                # Run detection in executor to avoid blocking
-                results = await loop.run_in_executor(
-                    executor,
-                    lambda: model.predict(frame, conf=0.5, verbose=False)
-                )
-                
-                # Process frame annotation in executor
-                annotated_frame = await loop.run_in_executor(
-                    executor,
-                    lambda: process_frame_annotation(frame.copy(), results, camera_id)
-                )
-                                    
-            except Exception as e:
-                print(f"Live detection error: {e}")
-                annotated_frame = frame
-            
-            # Encode frame in executor
-            buffer = await loop.run_in_executor(
-                executor,
-                lambda: cv2.imencode('.jpg', annotated_frame)[1]
-            )
-            
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-            
-            await asyncio.sleep(0.033)
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(executor, join_camera, camera_id):
+        print(f"Camera {camera_id} capture thread still running after {camera_stop_timeout}s")
+    await loop.run_in_executor(executor, save_camera_registry)
+    return {"id": camera_id, "removed": True}
+
+@app.get("/cameras/{camera_id}/stream")
+async def get_camera_stream(camera_id: str):
+    """Get live stream with detection for any registered camera"""
+    if camera_id not in active_cameras:
+        raise HTTPException(status_code=404, detail="Camera not found")
     
-    return StreamingResponse(generate_frames(), media_type="multipart/x-mixed-replace; boundary=frame")
+    broadcaster = get_broadcaster(camera_id)
+    return StreamingResponse(broadcaster.frames(), media_type="multipart/x-mixed-replace; boundary=frame")
 
 def process_frame_annotation(frame, results, camera_id):
     """Process frame annotation in a separate thread"""
@@ -395,7 +2331,7 @@ def process_frame_annotation(frame, results, camera_id):
             for box in r.boxes:
                 cls_id = int(box.cls[0])
                 confidence = float(box.conf[0])
-                class_name = model.names[cls_id]
+                class_name = class_names[cls_id]
                 
                 if class_name.lower() == 'elephant':
                     elephant_count += 1
@@ -0,0 +1,12 @@
+"""main.py reads its config and creates its working directories on import, so
+point it at a scratch directory and dummy routes before any test imports it."""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.chdir(tempfile.mkdtemp(prefix="elephant-tests-"))
+os.environ.setdefault("DATABASE_POST_API_ROUTE", "http://127.0.0.1:9/detections")
+os.environ.setdefault("SNAPSHOT_STORAGE", "imgbb")
+os.environ.setdefault("OUTBOX_PATH", "outbox.db")
@@ -0,0 +1,34 @@
+import main
+
+
+def test_expiring_key_store_reports_duplicates():
+    store = main.ExpiringKeyStore(ttl=60, max_entries=10)
+
+    assert store.check_and_add(("cam", 0, 0)) is False
+    assert store.check_and_add(("cam", 0, 0)) is True
+    assert store.check_and_add(("cam", 1, 0)) is False
+    assert len(store) == 2
+
+
+def test_expiring_key_store_forgets_old_keys(monkeypatch):
+    store = main.ExpiringKeyStore(ttl=20, max_entries=10)
+    now = [1000.0]
+    monkeypatch.setattr(main.time, "time", lambda: now[0])
+
+    store.add("a")
+    now[0] += 10
+    store.add("b")
+    now[0] += 15
+
+    assert len(store) == 1
+    assert store.check_and_add("a") is False
+    assert store.check_and_add("b") is True
+
+
+def test_expiring_key_store_evicts_oldest_over_capacity():
+    store = main.ExpiringKeyStore(ttl=60, max_entries=2)
+
+    for key in ("a", "b", "c"):
+        store.add(key)
+
+    assert list(store.entries) == ["b", "c"]
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+import main
+
+
+def detection(n, camera_id="cam"):
+    return {
+        "confidence": 0.9,
+        "track_id": n,
+        "camera_id": camera_id,
+        "location": "gate",
+        "event_id": f"event-{n}",
+    }
+
+
+@pytest.fixture
+def history(monkeypatch):
+    history = main.DetectionHistory(4)
+    monkeypatch.setattr(main, "detection_history", history)
+    monkeypatch.setattr(main, "detection_stream_keepalive", 0.05)
+    return history
+
+
+def test_resume_point_rejects_ids_from_other_boots(history):
+    for n in range(3):
+        history.add(detection(n), time.time(), None)
+
+    assert history.resume_point(history.stream_id(2)) == 2
+    assert history.resume_point("deadbeef-2") == 0
+    assert history.resume_point(history.stream_id(537)) == 0
+    assert history.resume_point("2") == 0
+    assert history.resume_point("") == 0
+
+
+def stream_ids(history, last_event_id, new_records=1):
+    """Ids a client receives when connecting with last_event_id while new records arrive"""
+    stream = main.DetectionEventStream(10)
+
+    async def run():
+        received = []
+
+        async def consume():
+            async for message in stream.events(last_event_id):
+                if message.startswith("id: "):
+                    received.append(message.split("\n", 1)[0][4:])
+
+        client = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        for n in range(new_records):
+            stream.publish(history.get(history.add(detection(100 + n), time.time(), None)))
+        stream.close()
+        await client
+        return received
+
+    return asyncio.run(run())
+
+
+def test_stream_resumes_after_last_event_id(history):
+    for n in range(3):
+        history.add(detection(n), time.time(), None)
+
+    received = stream_ids(history, history.stream_id(1))
+
+    assert received == [history.stream_id(n) for n in (2, 3, 4)]
+
+
+def test_stream_without_last_event_id_only_sends_new_records(history):
+    history.add(detection(0), time.time(), None)
+
+    assert stream_ids(history, None) == [history.stream_id(2)]
+
+
+def test_stream_replays_history_after_a_restart(history):
+    # Ids from before the restart are higher than anything this boot has issued
+    for n in range(2):
+        history.add(detection(n), time.time(), None)
+
+    received = stream_ids(history, "0badb007-537")
+
+    assert received == [history.stream_id(n) for n in (1, 2, 3)]
@@ -0,0 +1,43 @@
+import time
+
+import pytest
+
+import main
+
+
+def detection(n, camera_id="cam"):
+    return {
+        "confidence": 0.9,
+        "track_id": n,
+        "camera_id": camera_id,
+        "location": "gate",
+        "event_id": f"event-{n}",
+    }
+
+
+@pytest.fixture
+def history():
+    return main.DetectionHistory(4)
+
+
+def test_history_keeps_the_newest_records(history):
+    for n in range(6):
+        history.add(detection(n), time.time(), None)
+
+    assert history.total == 6
+    assert len(history) == 4
+    assert history.get(2) is None
+    assert history.get(6)["event_id"] == "event-5"
+    assert [record["id"] for record in history.after(0)] == [3, 4, 5, 6]
+    assert [record["id"] for record in history.after(4)] == [5, 6]
+
+
+def test_history_query_filters_newest_first(history):
+    history.add(detection(1, "a"), 100, None)
+    history.add(detection(2, "b"), 200, None)
+    history.add(detection(3, "a"), 300, None)
+
+    assert [record["id"] for record in history.query()] == [3, 2, 1]
+    assert [record["id"] for record in history.query(camera_id="a")] == [3, 1]
+    assert [record["id"] for record in history.query(since=150)] == [3, 2]
+    assert [record["id"] for record in history.query(limit=1)] == [3]
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = main.InferenceScheduler(max_batch_size=3, max_wait=0.2)
+    yield scheduler
+    scheduler.stop()
+
+
+def test_predict_records_stage_timings(scheduler):
+    scheduler.start([lambda frames: list(frames)])
+    timings = {}
+
+    scheduler.predict("cam", "frame", timings)
+
+    assert set(timings) == {"inference_queue", "inference"}
+    assert "inference" in main.stage_seconds.series
+
+
+def test_histogram_render():
+    histogram = main.Histogram("test_seconds", "Test durations", "stage", (0.1, 1))
+    histogram.observe("b", 0.5)
+    histogram.observe("a", 0.05)
+    histogram.observe("a", 2)
+
+    assert histogram.render().splitlines() == [
+        "# HELP test_seconds Test durations",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="a",le="0.1"} 1',
+        'test_seconds_bucket{stage="a",le="1"} 1',
+        'test_seconds_bucket{stage="a",le="+Inf"} 2',
+        'test_seconds_sum{stage="a"} 2.05',
+        'test_seconds_count{stage="a"} 2',
+        'test_seconds_bucket{stage="b",le="0.1"} 0',
+        'test_seconds_bucket{stage="b",le="1"} 1',
+        'test_seconds_bucket{stage="b",le="+Inf"} 1',
+        'test_seconds_sum{stage="b"} 0.5',
+        'test_seconds_count{stage="b"} 1',
+    ]
+
+
+class Response:
+    headers = {"content-type": "application/json"}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"success": True}
+
+
+def test_bulk_insert_time_is_added_to_every_record(monkeypatch):
+    async def http_post(url, **kwargs):
+        await asyncio.sleep(0.01)
+        return Response()
+
+    monkeypatch.setattr(main, "http_post", http_post)
+    timings = [{"annotate": 0.1}, {}]
+
+    assert asyncio.run(main.upload_batch_to_convex([{}, {}], timings))
+
+    assert [set(t) for t in timings] == [{"annotate", "upload_convex_batch"}, {"upload_convex_batch"}]
+    assert timings[0]["upload_convex_batch"] >= 0.01
+
+
+def test_single_upload_time_is_added_to_its_record(monkeypatch):
+    async def http_post(url, **kwargs):
+        response = Response()
+        response.status_code = 200
+        return response
+
+    monkeypatch.setattr(main, "http_post", http_post)
+    timings = {}
+
+    assert asyncio.run(main.upload_to_convex({"event_id": "a"}, "a", timings))
+
+    assert set(timings) == {"upload_convex"}
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    outbox = main.Outbox(str(tmp_path / "outbox.db"))
+    outbox.open()
+    monkeypatch.setattr(main, "outbox", outbox)
+    yield outbox
+    outbox.close()
+
+
+def record(n):
+    return {"event_id": f"event-{n}", "image_path": "https://example.com/a.jpg", "timestamp": "2024-01-01T00:00:00"}
+
+
+def test_records_come_back_oldest_first_once_due(outbox):
+    outbox.add("a", record(1), "snapshots/a.jpg", {"annotate": 0.1})
+    outbox.add("b", record(2), None)
+    outbox.add("a", record(3), None)  # same key, ignored
+
+    rows = outbox.due(float("inf"), 10)
+
+    assert [row[1] for row in rows] == ["a", "b"]
+    assert json.loads(rows[0][2]) == record(1)
+    assert json.loads(rows[0][6]) == {"annotate": 0.1}
+    assert outbox.snapshot_paths() == {"snapshots/a.jpg"}
+
+
+def test_retried_record_waits_for_its_next_attempt(outbox):
+    outbox.add("a", record(1), None)
+    row_id = outbox.due(float("inf"), 1)[0][0]
+
+    outbox.retry(row_id, 1, 5000.0, "timeout", {})
+
+    assert outbox.due(4999.0, 10) == []
+    assert outbox.due(5000.0, 10)[0][4] == 1
+    assert outbox.next_due() == 5000.0
+
+
+def test_parked_and_delivered_records_are_never_due(outbox):
+    outbox.add("a", record(1), None)
+    outbox.add("b", record(2), None)
+    a, b = (row[0] for row in outbox.due(float("inf"), 10))
+
+    outbox.park(a, 20, "rejected", {})
+    outbox.delivered([b])
+
+    assert outbox.due(float("inf"), 10) == []
+    assert outbox.next_due() is None
+    assert outbox.stats()["pending"] == 0
+    assert outbox.stats()["dead"] == 1
+
+
+def test_old_tables_are_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE NOT NULL, payload TEXT NOT NULL,
+            snapshot_path TEXT, attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL,
+            created REAL NOT NULL, last_error TEXT
+        )
+    """)
+    conn.execute("INSERT INTO outbox (key, payload, next_attempt, created) VALUES ('a', '{}', 0, 0)")
+    conn.commit()
+    conn.close()
+
+    outbox = main.Outbox(path)
+    outbox.open()
+    try:
+        assert [row[1] for row in outbox.due(1, 10)] == ["a"]
+        assert outbox.stats()["dead"] == 0
+    finally:
+        outbox.close()
+
+
+def test_failures_back_off_exponentially(outbox, monkeypatch):
+    monkeypatch.setattr(main.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(main.time, "time", lambda: 1000.0)
+    outbox.add("a", record(1), None)
+
+    delays = []
+    for _ in range(3):
+        row = outbox.due(float("inf"), 1)[0]
+        asyncio.run(main.reschedule_outbox_record(row, "timeout", {}))
+        delays.append(outbox.due(float("inf"), 1)[0][5] - 1000.0)
+
+    base = main.outbox_base_backoff
+    assert delays == [base, base * 2, base * 4]
+
+
+def test_backoff_is_capped(outbox, monkeypatch):
+    monkeypatch.setattr(main.random, "uniform", lambda low, high: high)
+    monkeypatch.setattr(main.time, "time", lambda: 1000.0)
+    outbox.add("a", record(1), None)
+    row = outbox.due(float("inf"), 1)[0]
+
+    asyncio.run(main.reschedule_outbox_record(row[:4] + (10,) + row[5:], "timeout", {}))
+
+    assert outbox.due(float("inf"), 1)[0][5] - 1000.0 == main.outbox_max_backoff
+
+
+def test_record_is_parked_after_max_attempts(outbox, monkeypatch):
+    monkeypatch.setattr(main, "outbox_max_attempts", 3)
+    outbox.add("a", record(1), None)
+    row = outbox.due(float("inf"), 1)[0]
+
+    asyncio.run(main.reschedule_outbox_record(row[:4] + (2,) + row[5:], "rejected", {"upload_convex": 0.2}))
+
+    assert outbox.due(float("inf"), 10) == []
+    assert outbox.stats()["dead"] == 1
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    """Record bulk and single uploads; keys listed in rejected fail"""
+    calls = {"batch": [], "single": [], "rejected": set(), "batch_ok": True}
+
+    async def upload_batch(records, timings=None):
+        calls["batch"].append([r["event_id"] for r in records])
+        return calls["batch_ok"]
+
+    async def upload_one(data, key=None, timings=None):
+        calls["single"].append(key)
+        return key not in calls["rejected"]
+
+    monkeypatch.setattr(main, "upload_batch_to_convex", upload_batch)
+    monkeypatch.setattr(main, "upload_to_convex", upload_one)
+    monkeypatch.setattr(main, "DATABASE_BATCH_POST_API_ROUTE", "http://127.0.0.1:9/batch")
+    return calls
+
+
+def deliver(outbox):
+    asyncio.run(main.deliver_outbox_batch(outbox.due(float("inf"), 10)))
+
+
+def test_batch_is_delivered_in_one_bulk_insert(outbox, uploads):
+    for n in range(3):
+        outbox.add(f"k{n}", record(n), None)
+
+    deliver(outbox)
+
+    assert uploads["batch"] == [["event-0", "event-1", "event-2"]]
+    assert uploads["single"] == []
+    assert outbox.stats()["pending"] == 0
+
+
+def test_failed_bulk_insert_falls_back_to_single_records(outbox, uploads):
+    uploads["batch_ok"] = False
+    uploads["rejected"] = {"k1"}
+    for n in range(3):
+        outbox.add(f"k{n}", record(n), None)
+
+    deliver(outbox)
+
+    assert sorted(uploads["single"]) == ["k0", "k1", "k2"]
+    remaining = outbox.due(float("inf"), 10)
+    assert [(row[1], row[4]) for row in remaining] == [("k1", 1)]
+
+
+def test_without_batch_route_records_are_posted_one_by_one(outbox, uploads, monkeypatch):
+    monkeypatch.setattr(main, "DATABASE_BATCH_POST_API_ROUTE", None)
+    outbox.add("k0", record(0), None)
+
+    deliver(outbox)
+
+    assert uploads["batch"] == []
+    assert uploads["single"] == ["k0"]
+    assert outbox.stats()["pending"] == 0
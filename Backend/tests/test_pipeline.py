@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+import main
+
+
+def event(camera_id, n=0):
+    return {
+        "camera_id": camera_id,
+        "n": n,
+        "timings": {},
+        "captured_at": time.time(),
+        "data": {"event_id": f"{camera_id}-{n}"},
+    }
+
+
+def fill(policy, events, queue_size=2):
+    """Ingress of a pipeline without workers after enqueuing events"""
+    pipeline = main.DetectionPipeline([("annotate", None)], queue_size, policy)
+
+    async def run():
+        pipeline.ingress_ready = asyncio.Event()
+        for e in events:
+            pipeline._enqueue(e)
+
+    asyncio.run(run())
+    return pipeline, [(e["camera_id"], e["n"]) for e in pipeline.ingress]
+
+
+def test_drop_newest_keeps_queued_events():
+    pipeline, queued = fill("drop_newest", [event("a", 1), event("b", 2), event("c", 3)])
+
+    assert queued == [("a", 1), ("b", 2)]
+    assert (pipeline.submitted, pipeline.dropped) == (3, 1)
+
+
+def test_drop_oldest_evicts_the_first_event():
+    pipeline, queued = fill("drop_oldest", [event("a", 1), event("b", 2), event("c", 3)])
+
+    assert queued == [("b", 2), ("c", 3)]
+    assert pipeline.dropped == 1
+
+
+def test_merge_replaces_the_same_cameras_event_in_place():
+    pipeline, queued = fill("merge", [event("a", 1), event("b", 2), event("a", 3)])
+
+    assert queued == [("a", 3), ("b", 2)]
+    assert (pipeline.merged, pipeline.dropped) == (1, 0)
+
+
+def test_merge_without_a_match_drops_the_oldest():
+    pipeline, queued = fill("merge", [event("a", 1), event("b", 2), event("c", 3)])
+
+    assert queued == [("b", 2), ("c", 3)]
+    assert (pipeline.merged, pipeline.dropped) == (0, 1)
+
+
+def test_events_pass_every_stage_in_order(monkeypatch):
+    monkeypatch.setattr(main, "pipeline_workers", {"annotate": 1, "encode": 1})
+    seen = []
+
+    async def annotate(e):
+        seen.append(("annotate", e["n"]))
+
+    async def encode(e):
+        if e["n"] == 2:
+            raise ValueError("encoder failed")
+        seen.append(("encode", e["n"]))
+
+    pipeline = main.DetectionPipeline([("annotate", annotate), ("encode", encode)], 4, "drop_newest")
+
+    async def run():
+        monkeypatch.setattr(main, "main_loop", asyncio.get_running_loop())
+        pipeline.start()
+        for n in range(1, 4):
+            pipeline.submit(event("a", n))
+        while pipeline.completed + pipeline.failed < 3:
+            await asyncio.sleep(0.01)
+        await pipeline.stop()
+
+    asyncio.run(run())
+
+    assert [n for stage, n in seen if stage == "encode"] == [1, 3]
+    assert (pipeline.completed, pipeline.failed) == (2, 1)
+    assert pipeline.metrics()["queue_depth"] == {"annotate": 0, "encode": 0}
+
+
+def test_queue_wait_is_recorded_per_stage(monkeypatch):
+    monkeypatch.setattr(main, "pipeline_workers", {"annotate": 1, "encode": 1})
+    e = event("a")
+
+    async def noop(_):
+        pass
+
+    pipeline = main.DetectionPipeline([("annotate", noop), ("encode", noop)], 4, "drop_newest")
+
+    async def run():
+        monkeypatch.setattr(main, "main_loop", asyncio.get_running_loop())
+        pipeline.start()
+        pipeline.submit(e)
+        while not pipeline.completed:
+            await asyncio.sleep(0.01)
+        await pipeline.stop()
+
+    asyncio.run(run())
+
+    assert set(e["timings"]) == {"annotate_queue", "annotate", "encode_queue", "encode"}
+
+
+@pytest.mark.parametrize("policy", ["drop_newest", "drop_oldest", "merge"])
+def test_ingress_never_grows_past_its_size(policy):
+    _, queued = fill(policy, [event(f"cam{n % 3}", n) for n in range(20)], queue_size=5)
+
+    assert len(queued) == 5
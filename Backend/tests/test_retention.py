@@ -0,0 +1,125 @@
+import os
+import time
+import zipfile
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import main
+
+DAY = 86400
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    paths = {}
+    for name in ("snapshot_dir", "thumbnail_dir", "archive_dir", "clip_dir"):
+        path = tmp_path / name
+        path.mkdir()
+        monkeypatch.setattr(main, name, str(path))
+        paths[name] = path
+    return paths
+
+
+def snapshot(dirs, name, age, size=100):
+    path = dirs["snapshot_dir"] / f"{name}.jpg"
+    path.write_bytes(name.encode().ljust(size, b"x"))
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def retention(max_bytes=10 ** 9, max_age=30 * DAY, pack_after=DAY):
+    return main.SnapshotRetention(max_bytes, max_age, pack_after, thumbnails=False)
+
+
+def test_old_snapshots_are_packed_into_daily_archives(dirs):
+    old = snapshot(dirs, "old", 2 * DAY)
+    new = snapshot(dirs, "new", 60)
+    day = datetime.fromtimestamp(os.path.getmtime(old)).strftime("%Y-%m-%d")
+    store = retention()
+
+    store.run_once(protected=set())
+
+    archive = dirs["archive_dir"] / f"{day}.zip"
+    assert not os.path.exists(old) and os.path.exists(new)
+    assert zipfile.ZipFile(archive).namelist() == ["old.jpg"]
+    assert store.read_archived("old.jpg").startswith(b"old")
+    assert store.stats["packed"] == 1
+
+
+def test_protected_snapshots_are_kept(dirs):
+    pending = snapshot(dirs, "pending", 40 * DAY)
+    store = retention()
+
+    store.run_once(protected={pending})
+
+    assert os.path.exists(pending)
+    assert list(dirs["archive_dir"].iterdir()) == []
+
+
+def test_snapshots_past_max_age_are_deleted_not_packed(dirs):
+    expired = snapshot(dirs, "expired", 40 * DAY)
+    store = retention()
+
+    store.run_once(protected=set())
+
+    assert not os.path.exists(expired)
+    assert list(dirs["archive_dir"].iterdir()) == []
+    assert store.stats["deleted"] == 1
+
+
+def test_oldest_files_go_first_over_the_size_budget(dirs):
+    oldest = snapshot(dirs, "oldest", 300)
+    older = snapshot(dirs, "older", 200)
+    newest = snapshot(dirs, "newest", 100)
+    clip = dirs["clip_dir"] / "cam_1_0.mp4"
+    clip.write_bytes(b"x" * 100)
+    os.utime(clip, (time.time() - 250,) * 2)
+    store = retention(max_bytes=150)
+
+    store.run_once(protected=set())
+
+    assert [os.path.exists(path) for path in (oldest, older, newest)] == [False, False, True]
+    assert not clip.exists()
+    assert store.stats["total_bytes"] == 100
+
+
+def test_deleting_an_archive_forgets_its_snapshots(dirs):
+    snapshot(dirs, "old", 2 * DAY)
+    store = retention()
+    store.run_once(protected=set())
+
+    store.max_age = 0
+    store.run_once(protected=set())
+
+    assert store.read_archived("old.jpg") is None
+    assert list(dirs["archive_dir"].iterdir()) == []
+
+
+def test_index_is_rebuilt_from_existing_archives(dirs):
+    with zipfile.ZipFile(dirs["archive_dir"] / "2024-01-01.zip", "w") as archive:
+        archive.writestr("a.jpg", b"jpeg")
+    store = retention()
+
+    store.load_index()
+
+    assert store.read_archived("a.jpg") == b"jpeg"
+
+
+def test_archives_count_as_old_as_the_end_of_their_day(dirs):
+    (dirs["archive_dir"] / "2024-01-01.zip").write_bytes(b"zip")
+
+    [(_, mtime, _)] = main.list_archives()
+
+    assert mtime == datetime(2024, 1, 2).timestamp()
+
+
+def test_thumbnails_are_written_for_stored_snapshots(dirs, monkeypatch):
+    monkeypatch.setattr(main, "snapshot_thumbnails", True)
+
+    path = main.store_snapshot(np.zeros((480, 640, 3), np.uint8))
+
+    thumbnail = main.cv2.imread(os.path.join(main.thumbnail_dir, os.path.basename(path)))
+    assert thumbnail.shape[:2] == (240, main.snapshot_thumbnail_width)
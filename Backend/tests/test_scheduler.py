@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = main.InferenceScheduler(max_batch_size=3, max_wait=0.2)
+    yield scheduler
+    scheduler.stop()
+
+
+def test_frames_are_batched_and_routed_back(scheduler):
+    batches = []
+
+    def runner(frames):
+        batches.append(list(frames))
+        return [f"result-{frame}" for frame in frames]
+
+    futures = [scheduler.submit(f"cam{n}", n) for n in range(5)]
+    scheduler.start([runner])
+
+    assert [future.result(timeout=2) for future in futures] == [[f"result-{n}"] for n in range(5)]
+    assert batches == [[0, 1, 2], [3, 4]]
+    assert scheduler.metrics()["batches"] == 2
+
+
+def test_partial_batch_waits_at_most_max_wait(scheduler):
+    scheduler.start([lambda frames: list(frames)])
+
+    started = time.monotonic()
+    assert scheduler.predict("cam", "frame") == ["frame"]
+
+    assert time.monotonic() - started < 1
+
+
+def test_runner_errors_reach_every_frame_of_the_batch(scheduler):
+    def runner(frames):
+        raise RuntimeError("model crashed")
+
+    futures = [scheduler.submit("cam", n) for n in range(2)]
+    scheduler.start([runner])
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model crashed"):
+            future.result(timeout=2)
+
+
+def test_wrong_result_count_fails_the_batch(scheduler):
+    future = scheduler.submit("cam", "frame")
+    scheduler.start([lambda frames: []])
+
+    with pytest.raises(RuntimeError, match="0 results for 1 frames"):
+        future.result(timeout=2)
+
+
+def test_stop_fails_frames_that_were_never_dispatched(scheduler):
+    queued = scheduler.submit("cam", 0)
+
+    scheduler.stop()
+
+    with pytest.raises(RuntimeError, match="stopped"):
+        queued.result(timeout=2)
+    with pytest.raises(RuntimeError, match="stopped"):
+        scheduler.submit("cam", 1).result(timeout=2)
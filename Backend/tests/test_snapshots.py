@@ -0,0 +1,23 @@
+import pytest
+
+import main
+
+
+def test_parse_range_variants():
+    assert main.parse_range(None, 100) is None
+    assert main.parse_range("bytes=-", 100) is None
+    assert main.parse_range("items=0-10", 100) is None
+    assert main.parse_range("bytes=0-9", 100) == (0, 9)
+    assert main.parse_range("bytes=90-", 100) == (90, 99)
+    assert main.parse_range("bytes=-10", 100) == (90, 99)
+    assert main.parse_range("bytes=50-500", 100) == (50, 99)
+    assert main.parse_range("bytes=-500", 100) == (0, 99)
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=20-10"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(main.HTTPException) as error:
+        main.parse_range(header, 100)
+
+    assert error.value.status_code == 416
+    assert error.value.headers["Content-Range"] == "bytes */100"
@@ -0,0 +1,64 @@
+import pytest
+
+import main
+
+
+@pytest.fixture
+def tracker():
+    return main.ElephantTracker(iou_threshold=0.3, min_hits=2, max_age=5)
+
+
+def test_track_enters_after_min_hits(tracker):
+    assert tracker.update([((0, 0, 100, 100), 0.8)], now=0) == []
+
+    events = tracker.update([((5, 5, 105, 105), 0.9)], now=1)
+
+    assert [(event, track.id) for event, track in events] == [("enter", 1)]
+    assert events[0][1].box == (5, 5, 105, 105)
+    assert events[0][1].peak_confidence == 0.9
+
+
+def test_matched_track_updates_instead_of_entering_again(tracker):
+    tracker.update([((0, 0, 100, 100), 0.8)], now=0)
+    tracker.update([((5, 5, 105, 105), 0.9)], now=1)
+
+    events = tracker.update([((10, 10, 110, 110), 0.7)], now=2)
+
+    assert [(event, track.id) for event, track in events] == [("update", 1)]
+    assert events[0][1].peak_confidence == 0.9
+
+
+def test_far_moved_box_matches_by_centroid(tracker):
+    tracker.update([((0, 0, 100, 100), 0.8)], now=0)
+
+    # No overlap any more, but the centre moved less than the box diagonal
+    events = tracker.update([((110, 0, 210, 100), 0.8)], now=1)
+
+    assert [(event, track.id) for event, track in events] == [("enter", 1)]
+    assert len(tracker.tracks) == 1
+
+
+def test_separate_elephants_get_separate_tracks(tracker):
+    tracker.update([((0, 0, 100, 100), 0.8), ((500, 500, 600, 600), 0.8)], now=0)
+
+    events = tracker.update([((2, 2, 102, 102), 0.8), ((502, 502, 602, 602), 0.8)], now=1)
+
+    assert sorted(track.id for _, track in events) == [1, 2]
+
+
+def test_confirmed_track_exits_after_max_age(tracker):
+    tracker.update([((0, 0, 100, 100), 0.8)], now=0)
+    tracker.update([((0, 0, 100, 100), 0.8)], now=1)
+
+    assert tracker.expire(now=5) == []
+    events = tracker.expire(now=7)
+
+    assert [(event, track.id) for event, track in events] == [("exit", 1)]
+    assert tracker.tracks == {}
+
+
+def test_unconfirmed_track_expires_silently(tracker):
+    tracker.update([((0, 0, 100, 100), 0.8)], now=0)
+
+    assert tracker.expire(now=10) == []
+    assert tracker.tracks == {}
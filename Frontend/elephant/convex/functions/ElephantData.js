@@ -2,29 +2,60 @@
 import { v } from "convex/values";
 import { mutation, query } from "../../convex/_generated/server.js";
 
+const elephantRecord = {
+  type: v.string(),
+  camera_id: v.string(),
+  location: v.string(),
+  message: v.string(),
+  timestamp: v.string(),
+  confidence: v.number(),
+  // image_url: v.string(),
+  image_path: v.string(),
+  event_id: v.optional(v.string()),
+};
+
+// Records carrying an event_id are only inserted once, so backend retries are safe
+async function insertElephantData(ctx, record) {
+  if (record.event_id) {
+    const existing = await ctx.db
+      .query("elephant_Schema")
+      .withIndex("by_event_id", (q) => q.eq("event_id", record.event_id))
+      .first();
+
+    if (existing) {
+      return existing._id;
+    }
+  }
+
+  return await ctx.db.insert("elephant_Schema", record);
+}
+
 export const addElephantData = mutation({
+  args: elephantRecord,
+  handler: async (ctx, args) => {
+    return await insertElephantData(ctx, args);
+  },
+});
+
+export const addElephantDataBatch = mutation({
   args: {
-    type: v.string(),
-    camera_id: v.string(),
-    location: v.string(),
-    message: v.string(),
-    timestamp: v.string(),
-    confidence: v.number(),
-    // image_url: v.string(),
-    image_path: v.string(),
+    records: v.array(v.object(elephantRecord)),
   },
   handler: async (ctx, args) => {
-    return await ctx.db.insert("elephant_Schema", args);
+    const ids = [];
+    for (const record of args.records) {
+      ids.push(await insertElephantData(ctx, record));
+    }
+    return ids;
   },
 });
 
 export const getAlerts = query({
+  args: { limit: v.optional(v.number()) },
   handler: async (ctx, args) => {
-    const alerts = await ctx.db
-      .query("elephant_Schema")
-      .order("desc")
-      .collect();
+    const alerts = ctx.db.query("elephant_Schema").order("desc");
 
-    return alerts;
+    // Views that only show the latest alerts should not read the whole table
+    return args.limit ? await alerts.take(args.limit) : await alerts.collect();
   },
 });
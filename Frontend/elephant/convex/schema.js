@@ -12,7 +12,8 @@ export default defineSchema({
     confidence: v.number(),
     // image_url: v.string(),
     image_path: v.string(),
-  }),
+    event_id: v.optional(v.string()),
+  }).index("by_event_id", ["event_id"]),
   token_Schema: defineTable({
     token: v.string(),
   }),
@@ -0,0 +1,44 @@
+import { ConvexHttpClient } from "convex/browser";
+import { api } from "../../../../../convex/_generated/api";
+
+const convex = new ConvexHttpClient(process.env.NEXT_PUBLIC_CONVEX_URL);
+
+// Bulk variant of api/useData: the backend flushes queued detections here in one request
+export async function POST(request) {
+  const body = await request.json();
+  const records = (body.records || []).map((record) => ({
+    type: record.type || "Unknown",
+    camera_id: record.camera_id || "Unknown",
+    location: record.location || "Unknown",
+    message: record.message || "No message",
+    timestamp: record.timestamp || new Date().toISOString(),
+    confidence: record.confidence || 0,
+    image_path: record.image_path || "No image path",
+    event_id: record.event_id || undefined,
+  }));
+
+  try {
+    await convex.mutation(api.functions.ElephantData.addElephantDataBatch, {
+      records,
+    });
+
+    return Response.json(
+      {
+        status: 201,
+        message: `${records.length} records added successfully`,
+        success: true,
+      },
+      { status: 201 }
+    );
+  } catch (err) {
+    console.error("Convex error:", err);
+    return Response.json(
+      {
+        status: 500,
+        message: "Error adding data",
+        success: false,
+      },
+      { status: 500 }
+    );
+  }
+}
@@ -19,6 +19,7 @@ export async function POST(request) {
       confidence: body.confidence || 0,
       // image_url: body.image_url,
       image_path: body.image_path || "No image path",
+      event_id: body.event_id || undefined,
     });
 
     return Response.json({
@@ -10,7 +10,7 @@ import { useQuery } from "convex/react";
 import moment from "moment";
 
 export default function ElephantWatchDashboard() {
-  const alerts = useQuery(api.functions.ElephantData.getAlerts);
+  const alerts = useQuery(api.functions.ElephantData.getAlerts, { limit: 50 });
   const [showPopup, setShowPopup] = useState(false);
 
   if (!alerts) {
@@ -0,0 +1,196 @@
+"""Distill the large elephant detector into small students and compare them.
+
+    python distill.py --teacher runs/detect/train/weights/best.pt --data Train-Elephant-3/data.yaml
+    python distill.py --compare-only --data Train-Elephant-3/data.yaml --models best.pt yolov8n-distilled.pt
+
+The teacher labels every training image; its confident boxes that ground truth
+does not already cover are added to the labels (pseudo-label distillation), so the
+students learn from what the teacher sees while keeping the original class map.
+Each student is then trained on that set and all models are compared on the
+original validation split: mAP50, mAP50-95 and CPU latency per image.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+
+import yaml
+from ultralytics import YOLO
+from ultralytics.data.utils import IMG_FORMATS, check_det_dataset, img2label_paths
+
+
+def box_iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0
+
+
+def xywh_to_xyxy(x, y, w, h):
+    return (x - w / 2, y - h / 2, x + w / 2, y + h / 2)
+
+
+def list_images(source):
+    """Image files of a dataset split given as a directory, a list file or a list of either"""
+    if isinstance(source, list):
+        return [image for item in source for image in list_images(item)]
+    if os.path.isdir(source):
+        return sorted(
+            path for path in glob.glob(os.path.join(source, "**", "*"), recursive=True)
+            if path.rsplit(".", 1)[-1].lower() in IMG_FORMATS
+        )
+    with open(source) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def read_labels(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [line.split() for line in f if line.strip()]
+
+
+def build_distillation_set(teacher_path, data, output_dir, conf, iou_threshold):
+    """Copy the training split with ground truth merged with the teacher's pseudo-labels.
+
+    Returns the path of a data.yaml pointing at the new training split and the
+    original validation split, with the dataset's class names.
+    """
+    dataset = check_det_dataset(data)
+    teacher = YOLO(teacher_path)
+    if dict(teacher.names) != dict(dataset["names"]):
+        raise ValueError(f"Teacher classes {teacher.names} do not match the dataset's {dataset['names']}")
+
+    image_dir = os.path.join(output_dir, "images", "train")
+    label_dir = os.path.join(output_dir, "labels", "train")
+    os.makedirs(image_dir, exist_ok=True)
+    os.makedirs(label_dir, exist_ok=True)
+
+    images = list_images(dataset["train"])
+    added = 0
+    for image, label in zip(images, img2label_paths(images)):
+        labels = read_labels(label)
+        truth = [(int(cls), xywh_to_xyxy(*map(float, box[:4]))) for cls, *box in labels]
+
+        result = teacher.predict(image, conf=conf, verbose=False)[0]
+        for cls, box in zip(result.boxes.cls.tolist(), result.boxes.xywhn.tolist()):
+            xyxy = xywh_to_xyxy(*box)
+            if any(int(cls) == other_cls and box_iou(xyxy, other) >= iou_threshold for other_cls, other in truth):
+                continue
+            labels.append([str(int(cls))] + [f"{value:.6f}" for value in box])
+            added += 1
+
+        name = os.path.basename(image)
+        shutil.copy2(image, os.path.join(image_dir, name))
+        with open(os.path.join(label_dir, os.path.splitext(name)[0] + ".txt"), "w") as f:
+            f.writelines(" ".join(row) + "\n" for row in labels)
+
+    print(f"Distillation set: {len(images)} images, {added} teacher boxes added to the ground truth")
+
+    data_yaml = os.path.join(output_dir, "data.yaml")
+    with open(data_yaml, "w") as f:
+        yaml.safe_dump({
+            "path": os.path.abspath(output_dir),
+            "train": "images/train",
+            "val": dataset["val"],
+            "names": dict(dataset["names"]),
+        }, f)
+    return data_yaml
+
+
+def train_student(student, data_yaml, epochs, imgsz, batch):
+    model = YOLO(student)
+    name = f"distill_{os.path.splitext(os.path.basename(student))[0]}"
+    model.train(data=data_yaml, epochs=epochs, imgsz=imgsz, batch=batch, name=name, exist_ok=True)
+    weights = os.path.join(str(model.trainer.save_dir), "weights", "best.pt")
+    print(f"Student {student} trained: {weights}")
+    return weights
+
+
+def latency_ms(path, images, imgsz, rounds=3):
+    """Mean single-image CPU inference time"""
+    model = YOLO(path)
+    model.predict(images[0], imgsz=imgsz, device="cpu", verbose=False)  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for image in images:
+            model.predict(image, imgsz=imgsz, device="cpu", verbose=False)
+    return (time.perf_counter() - start) * 1000 / (rounds * len(images))
+
+
+def compare(models, data, imgsz, latency_images):
+    dataset = check_det_dataset(data)
+    images = list_images(dataset["val"])[:latency_images]
+    rows = []
+    for path in models:
+        model = YOLO(path)
+        if dict(model.names) != dict(dataset["names"]):
+            raise ValueError(f"{path} classes {model.names} do not match the dataset's {dataset['names']}")
+        metrics = model.val(data=data, imgsz=imgsz, plots=False, verbose=False)
+        rows.append({
+            "model": path,
+            "parameters": sum(p.numel() for p in model.model.parameters()),
+            "size_mb": os.path.getsize(path) / 1e6,
+            "mAP50": float(metrics.box.map50),
+            "mAP50-95": float(metrics.box.map),
+            "cpu_latency_ms": latency_ms(path, images, imgsz),
+        })
+    return rows
+
+
+def write_report(rows, path):
+    lines = [
+        "| Model | Params (M) | Size (MB) | mAP50 | mAP50-95 | CPU latency (ms) |",
+        "| --- | --- | --- | --- | --- | --- |",
+    ]
+    for row in rows:
+        lines.append(
+            f"| {row['model']} | {row['parameters'] / 1e6:.1f} | {row['size_mb']:.1f} | {row['mAP50']:.4f} "
+            f"| {row['mAP50-95']:.4f} | {row['cpu_latency_ms']:.1f} |"
+        )
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    with open(os.path.splitext(path)[0] + ".json", "w") as f:
+        json.dump(rows, f, indent=2)
+    print("\n".join(lines))
+    print(f"Report written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teacher", help="trained large model (best.pt)")
+    parser.add_argument("--data", required=True, help="dataset yaml the teacher was trained on")
+    parser.add_argument("--students", nargs="+", default=["yolov8n.pt", "yolov8s.pt"])
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--pseudo-conf", type=float, default=0.5, help="teacher confidence needed for a pseudo-label")
+    parser.add_argument("--pseudo-iou", type=float, default=0.5, help="overlap with ground truth above which a teacher box is dropped")
+    parser.add_argument("--output", default="distill_data")
+    parser.add_argument("--latency-images", type=int, default=50)
+    parser.add_argument("--report", default="files/distillation_report.md")
+    parser.add_argument("--compare-only", action="store_true", help="skip training, only compare --models")
+    parser.add_argument("--models", nargs="+", help="weights to compare with --compare-only")
+    args = parser.parse_args()
+
+    if args.compare_only:
+        if not args.models:
+            parser.error("--compare-only needs --models")
+        models = args.models
+    else:
+        if not args.teacher:
+            parser.error("--teacher is required for distillation")
+        data_yaml = build_distillation_set(args.teacher, args.data, args.output, args.pseudo_conf, args.pseudo_iou)
+        students = [train_student(student, data_yaml, args.epochs, args.imgsz, args.batch) for student in args.students]
+        models = [args.teacher] + students
+
+    write_report(compare(models, args.data, args.imgsz, args.latency_images), args.report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""INT8 post-training quantization of the trained detector, gated on validation accuracy.
+
+    python quantize.py --weights runs/detect/train/weights/best.pt --data Train-Elephant-3/data.yaml
+
+Exports an INT8 OpenVINO model calibrated on the dataset, validates it next to the
+FP32 weights and only copies it to the backend (Backend/model/best_int8_openvino_model,
+loaded with MODEL_BACKEND=openvino MODEL_PRECISION=int8) when the mAP drop stays
+within the limits. Exits non-zero when the gate fails.
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+
+from ultralytics import YOLO
+
+PUBLISH_DIR = "../Backend/model/best_int8_openvino_model"
+
+
+def int8_export(weights, data, imgsz, fraction):
+    """Quantize with the dataset's training images as calibration set"""
+    exported = YOLO(weights).export(
+        format="openvino", int8=True, data=data, imgsz=imgsz, fraction=fraction, dynamic=True, batch=8
+    )
+    print(f"INT8 model exported to {exported}")
+    return exported
+
+
+def validate(path, data, imgsz):
+    metrics = YOLO(path, task="detect").val(data=data, imgsz=imgsz, batch=1, plots=False, verbose=False)
+    return {"mAP50": float(metrics.box.map50), "mAP50-95": float(metrics.box.map)}
+
+
+def throughput(path, images, imgsz, rounds=3):
+    """Frames per second of single-image CPU inference"""
+    model = YOLO(path, task="detect")
+    model.predict(images[0], imgsz=imgsz, device="cpu", verbose=False)  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for image in images:
+            model.predict(image, imgsz=imgsz, device="cpu", verbose=False)
+    return rounds * len(images) / (time.perf_counter() - start)
+
+
+def training_metrics(path):
+    """Final-epoch validation metrics recorded during training, if available"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        rows = [{key.strip(): value for key, value in row.items()} for row in csv.DictReader(f)]
+    if not rows:
+        return None
+    return {"mAP50": float(rows[-1]["metrics/mAP50(B)"]), "mAP50-95": float(rows[-1]["metrics/mAP50-95(B)"])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", required=True, help="trained FP32 weights (best.pt)")
+    parser.add_argument("--data", required=True, help="dataset yaml, used for calibration and validation")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--fraction", type=float, default=0.25, help="share of the training images used for calibration")
+    parser.add_argument("--max-map50-drop", type=float, default=0.01)
+    parser.add_argument("--max-map-drop", type=float, default=0.015, help="largest allowed mAP50-95 drop")
+    parser.add_argument("--images", default="val_batch", help="images used for the throughput comparison")
+    parser.add_argument("--training-results", default="files/results.csv", help="results.csv of the training run")
+    parser.add_argument("--report", default="files/quantization_report.json")
+    parser.add_argument("--publish-dir", default=PUBLISH_DIR)
+    parser.add_argument("--no-publish", action="store_true", help="only report, never copy the model")
+    args = parser.parse_args()
+
+    exported = int8_export(args.weights, args.data, args.imgsz, args.fraction)
+
+    fp32 = validate(args.weights, args.data, args.imgsz)
+    int8 = validate(exported, args.data, args.imgsz)
+    deltas = {metric: int8[metric] - fp32[metric] for metric in fp32}
+    report = {"fp32": fp32, "int8": int8, "delta": deltas, "training": training_metrics(args.training_results)}
+
+    images = sorted(glob.glob(os.path.join(args.images, "*.jpg")))
+    if images:
+        fp32_fps = throughput(args.weights, images, args.imgsz)
+        int8_fps = throughput(exported, images, args.imgsz)
+        report["fps"] = {"fp32": fp32_fps, "int8": int8_fps, "speedup": int8_fps / fp32_fps}
+
+    for metric in fp32:
+        print(f"{metric}: FP32 {fp32[metric]:.4f}  INT8 {int8[metric]:.4f}  delta {deltas[metric]:+.4f}")
+    if report["training"]:
+        print(f"Training run reported mAP50 {report['training']['mAP50']:.4f}, mAP50-95 {report['training']['mAP50-95']:.4f}")
+    if "fps" in report:
+        print(f"CPU fps: FP32 {report['fps']['fp32']:.1f}  INT8 {report['fps']['int8']:.1f}  ({report['fps']['speedup']:.2f}x)")
+
+    failures = []
+    if -deltas["mAP50"] > args.max_map50_drop:
+        failures.append(f"mAP50 dropped by {-deltas['mAP50']:.4f} (limit {args.max_map50_drop})")
+    if -deltas["mAP50-95"] > args.max_map_drop:
+        failures.append(f"mAP50-95 dropped by {-deltas['mAP50-95']:.4f} (limit {args.max_map_drop})")
+    report["passed"] = not failures
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.report}")
+
+    if failures:
+        for failure in failures:
+            print(f"Accuracy gate failed: {failure}")
+        print("INT8 model not published")
+        return 1
+
+    if not args.no_publish:
+        if os.path.exists(args.publish_dir):
+            shutil.rmtree(args.publish_dir)
+        shutil.copytree(exported, args.publish_dir)
+        print(f"INT8 model published to {args.publish_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())